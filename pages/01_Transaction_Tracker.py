@@ -2,19 +2,28 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-from datetime import date
-import plotly.express as px
 
 # Add project root to Python path so we can import from src/
 import sys
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.append(str(PROJECT_ROOT))
 
-from src.data_loader import process_bank_data_folders, load_and_standardize_one_transaction_file
-from src.categorizer import categorize_transactions_df, CATEGORY_RULES
 from src.utils import convert_currency_in_df, DKK_TO_EUR_RATE
+from src.page_helpers import (
+    get_compiled_rules,
+    cached_process_folders,
+    cached_load_one,
+    process_and_categorize_data,
+    store_categorized_df,
+    get_categorized_df,
+    sorted_categories,
+    build_date_category_mask,
+    split_expenses
+)
 
 from src.plotting_functions import (
+    build_monthly_summary,
+    build_monthly_category_spend,
     plot_spending_by_category, 
     plot_income_expense_trend, 
     plot_net_savings_trend,
@@ -35,39 +44,10 @@ if 'raw_transactions_df' not in st.session_state:
 if 'categorized_transactions_df' not in st.session_state:
     st.session_state.categorized_transactions_df = pd.DataFrame()
 if 'rules_for_categorization' not in st.session_state:
-    st.session_state.rules_for_categorization = CATEGORY_RULES
+    st.session_state.rules_for_categorization = get_compiled_rules()
 if 'data_loaded_successfully' not in st.session_state:
     st.session_state.data_loaded_successfully = False
 
-# --- Helper to dedupe + categorize ---
-def process_and_categorize_data(df_in):
-    """ Deduplicate on (Date, Description, Amount, Original_Bank) and then categorize. """
-    if df_in.empty:
-        return pd.DataFrame()
-
-    # Make sure Date is datetime
-    df = df_in.copy()
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-
-    # Create a simple ID for deduplication
-    if all(col in df.columns for col in ['Date', 'Description', 'Amount', 'Original_Bank']):
-        def make_temp_id(r):
-            ds = r['Date'].strftime('%Y-%m-%d') if pd.notna(r['Date']) else 'NoDate'
-            desc = str(r['Description'])[:50] if pd.notna(r['Description']) else 'NoDesc'
-            amt = f"{r['Amount']:.2f}" if pd.notna(r['Amount']) else 'NoAmt'
-            bank = str(r['Original_Bank']) if pd.notna(r['Original_Bank']) else 'NoBank'
-            return f"{ds}-{desc}-{amt}-{bank}"
-
-        df['Temp_ID'] = df.apply(make_temp_id, axis=1)
-        df = df.drop_duplicates(subset=['Temp_ID'], keep='first').drop(columns=['Temp_ID'])
-
-    # Now categorize using your rules
-    df_cat = categorize_transactions_df(
-        df.copy(),
-        st.session_state.rules_for_categorization
-    )
-    return df_cat
-
 # --- Sidebar: Data Source Selection ---
 st.sidebar.header("Load Data")
 data_source_option = st.sidebar.radio(
@@ -92,15 +72,18 @@ if st.sidebar.button("Load and Categorize Data", key="load_data_btn"):
             for entry in cached:
                 file_obj = entry['file']
                 bank_type = entry['bank_type']
-                file_obj.seek(0)
-                df_one = load_and_standardize_one_transaction_file(file_obj, bank_name=bank_type)
+                # Raw bytes are hashable, so identical uploads hit the cache
+                df_one = cached_load_one(file_obj.getvalue(), bank_type)
                 if not df_one.empty:
                     frames.append(df_one)
 
             if frames:
                 combined = pd.concat(frames, ignore_index=True)
+                combined['Original_Bank'] = combined['Original_Bank'].astype('category')
                 st.session_state.raw_transactions_df = combined
-                st.session_state.categorized_transactions_df = process_and_categorize_data(combined)
+                store_categorized_df(process_and_categorize_data(
+                    combined, st.session_state.rules_for_categorization
+                ))
                 st.session_state.data_loaded_successfully = True
                 st.sidebar.success(
                     f"Uploaded files processed. "
@@ -113,9 +96,11 @@ if st.sidebar.button("Load and Categorize Data", key="load_data_btn"):
         default_path = PROJECT_ROOT / "bank_statements_test"
         folder_path = Path(st.session_state.get('local_folder_path_cache', str(default_path)))
         if folder_path.exists() and folder_path.is_dir():
-            loaded = process_bank_data_folders(folder_path)
+            loaded = cached_process_folders(str(folder_path))
             st.session_state.raw_transactions_df = loaded
-            st.session_state.categorized_transactions_df = process_and_categorize_data(loaded)
+            store_categorized_df(process_and_categorize_data(
+                loaded, st.session_state.rules_for_categorization
+            ))
             st.session_state.data_loaded_successfully = True
             st.sidebar.success(
                 f"Data from folders loaded successfully. "
@@ -160,10 +145,53 @@ else:  # Process Local Folders
     )
     st.session_state.local_folder_path_cache = folder_input
 
-# --- Main Display: only when data is loaded & categorized ---
-if st.session_state.data_loaded_successfully and not st.session_state.categorized_transactions_df.empty:
-    df_display_base = st.session_state.categorized_transactions_df.copy()
+# --- Summary sections as fragments: a widget inside one section (e.g. the deep-dive category
+# selector) reruns only that section instead of the whole page and all other plots. ---
+@st.experimental_fragment
+def spending_by_category_section(expenses, currency_suffix):
+    plot_spending_by_category(expenses, currency_suffix)
+
+@st.experimental_fragment
+def income_expense_trend_section(df_filtered, currency_suffix, monthly_summary):
+    plot_income_expense_trend(df_filtered, currency_suffix, monthly_summary=monthly_summary)
+
+@st.experimental_fragment
+def net_savings_trend_section(df_filtered, currency_suffix, monthly_summary):
+    plot_net_savings_trend(df_filtered, currency_suffix, monthly_summary=monthly_summary)
+
+@st.experimental_fragment
+def balance_trend_section(df_filtered, currency_suffix):
+    plot_balance_trend(df_filtered, currency_suffix)
+
+@st.experimental_fragment
+def monthly_spending_by_category_section(expenses, currency_suffix, monthly_category_spend):
+    plot_monthly_spending_by_category(expenses, currency_suffix, monthly_category_spend=monthly_category_spend)
 
+@st.experimental_fragment
+def percentage_change_expenses_section(expenses, currency_suffix, monthly_category_spend):
+    plot_percentage_change_expenses(expenses, currency_suffix, monthly_category_spend=monthly_category_spend)
+
+@st.experimental_fragment
+def savings_rate_trend_section(df_filtered, currency_suffix, monthly_summary):
+    plot_savings_rate_trend(df_filtered, currency_suffix, monthly_summary=monthly_summary)
+
+@st.experimental_fragment
+def big_ticket_expenses_section(expenses, currency_suffix):
+    display_big_ticket_expenses(expenses, currency_suffix)
+
+@st.experimental_fragment
+def category_deep_dive_fragment(expenses, currency_suffix):
+    category_deep_dive_section(expenses, currency_suffix)
+
+@st.experimental_fragment
+def net_worth_snapshot_section(currency_suffix):
+    display_net_worth_snapshot(currency_suffix)
+
+# --- Main Display: only when data is loaded & categorized ---
+# get_categorized_df() returns the shared per-dataset frame: only read/filter it below
+# (convert_currency_in_df copies before converting)
+df_display_base = get_categorized_df() if st.session_state.data_loaded_successfully else pd.DataFrame()
+if not df_display_base.empty:
     # --- Currency Conversion (unchanged) ---
     st.sidebar.markdown("---")
     st.sidebar.header("Display Options")
@@ -175,8 +203,9 @@ if st.session_state.data_loaded_successfully and not st.session_state.categorize
 
     currency_suffix = "DKK"
     if display_currency == "EUR":
+        # convert_currency_in_df copies internally
         df_display_base = convert_currency_in_df(
-            df_display_base.copy(),
+            df_display_base,
             target_currency="EUR",
             rate_dkk_eur=DKK_TO_EUR_RATE
         )
@@ -185,8 +214,7 @@ if st.session_state.data_loaded_successfully and not st.session_state.categorize
     # --- Filtering Section (unchanged) ---
     st.header("Filters & Transactions")
 
-    df_display_base['Date'] = pd.to_datetime(df_display_base['Date'], errors='coerce')
-    df_display_base = df_display_base.dropna(subset=['Date'])
+    # Dates are parsed and undated rows dropped once in process_and_categorize_data
     if df_display_base.empty:
         st.warning("No valid date data remains after parsing.")
     else:
@@ -195,101 +223,103 @@ if st.session_state.data_loaded_successfully and not st.session_state.categorize
         if min_d > max_d:
             min_d, max_d = max_d, min_d
 
-        c1, c2 = st.columns(2)
-        with c1:
-            start_date = st.date_input(
-                "Start date",
-                min_value=min_d,
-                max_value=max_d,
-                value=min_d,
-                key="min_date_filter"
-            )
-        with c2:
-            end_date = st.date_input(
-                "End date",
-                min_value=min_d,
-                max_value=max_d,
-                value=max_d,
-                key="max_date_filter"
-            )
+        # Batch the filter widgets in a form: edits only rerun the page once, on "Apply filters".
+        # Between submissions the widgets keep returning the last applied values.
+        with st.form("filters"):
+            c1, c2 = st.columns(2)
+            with c1:
+                start_date = st.date_input(
+                    "Start date",
+                    min_value=min_d,
+                    max_value=max_d,
+                    value=min_d,
+                    key="min_date_filter"
+                )
+            with c2:
+                end_date = st.date_input(
+                    "End date",
+                    min_value=min_d,
+                    max_value=max_d,
+                    value=max_d,
+                    key="max_date_filter"
+                )
 
-        all_cats = sorted(df_display_base['Category'].unique().tolist())
-        select_all = st.checkbox("Select/Deselect All Categories", value=True, key="select_all_cat_cb")
-        default_cats = all_cats if select_all else []
+            all_cats = sorted_categories(df_display_base)
+            select_all = st.checkbox("Select/Deselect All Categories", value=True, key="select_all_cat_cb")
+            default_cats = list(all_cats) if select_all else [] # Streamlit wants a list (not an Index) for defaults
 
-        chosen_cats = st.multiselect(
-            "Filter by Category:",
-            all_cats,
-            default=default_cats,
-            key="category_filter"
-        )
+            chosen_cats = st.multiselect(
+                "Filter by Category:",
+                all_cats,
+                default=default_cats,
+                key="category_filter"
+            )
+            st.form_submit_button("Apply filters")
 
-        mask = (
-            (df_display_base['Date'].dt.date >= start_date) &
-            (df_display_base['Date'].dt.date <= end_date) &
-            (df_display_base['Category'].isin(chosen_cats))
-        )
-        df_filtered = df_display_base.loc[mask].copy()
+        mask = build_date_category_mask(df_display_base, start_date, end_date, chosen_cats)
+        df_filtered = df_display_base.loc[mask]
 
         if df_filtered.empty:
             st.warning("No transactions match the current filters.")
         else:
             st.subheader("Filtered Transactions")
-            st.dataframe(
-                df_filtered[['Date', 'Description', 'Amount', 'Category', 'Original_Bank', 'Status']]
-            )
+            # Only ship a preview to the browser; the full set is available as a download
+            row_cap = 500
+            display_cols = ['Date', 'Description', 'Amount', 'Category', 'Original_Bank', 'Status']
+            st.dataframe(df_filtered[display_cols].head(row_cap))
+            if len(df_filtered) > row_cap:
+                st.caption(f"Showing the first {row_cap} of {len(df_filtered)} transactions.")
+            with st.expander("Download all filtered transactions"):
+                st.download_button(
+                    "Download filtered CSV",
+                    df_filtered[display_cols].to_csv(index=False).encode('utf-8'),
+                    file_name="filtered_transactions.csv",
+                    mime="text/csv",
+                    key="download_filtered_csv"
+                )
             st.metric("Total Transactions Displayed", len(df_filtered))
 
             # --- Financial Summary ---
             st.header("Financial Summary")
 
-            # Call your modular plotting functions
+            # The plotting/analysis helpers copy internally wherever they mutate.
+            expenses = split_expenses(df_filtered)
+            # Monthly aggregations computed once and shared by the trend plots below
+            monthly_summary = build_monthly_summary(df_filtered)
+            monthly_category_spend = build_monthly_category_spend(expenses)
+
+            # Call your modular plotting functions (each wrapped in its own fragment)
             # 1. Spending by Category
-            plot_spending_by_category(
-                df_filtered[df_filtered['Amount'] < 0].copy(), # Pass only expenses
-                currency_suffix
-            )
+            spending_by_category_section(expenses, currency_suffix)
             
             # 2. Income vs. Expense Trend
-            plot_income_expense_trend(df_filtered.copy(), currency_suffix)
+            income_expense_trend_section(df_filtered, currency_suffix, monthly_summary)
 
             # 3. Net Savings Trend
-            plot_net_savings_trend(df_filtered.copy(), currency_suffix)
+            net_savings_trend_section(df_filtered, currency_suffix, monthly_summary)
 
             # 4. Balance Trend
-            plot_balance_trend(df_filtered.copy(), currency_suffix)
+            balance_trend_section(df_filtered, currency_suffix)
             
             # 5. Monthly Spending by Category (NEW)
-            plot_monthly_spending_by_category(
-                df_filtered[df_filtered['Amount'] < 0].copy(), # Pass only expenses
-                currency_suffix
-            )
+            monthly_spending_by_category_section(expenses, currency_suffix, monthly_category_spend)
 
             # 6. Percentage Change in Expenses (NEW)
-            plot_percentage_change_expenses(
-                df_filtered[df_filtered['Amount'] < 0].copy(), # Pass only expenses
-                currency_suffix
-            )
+            percentage_change_expenses_section(expenses, currency_suffix, monthly_category_spend)
 
             # 7. Savings Rate Trend (NEW)
-            plot_savings_rate_trend(df_filtered.copy(), currency_suffix)
+            savings_rate_trend_section(df_filtered, currency_suffix, monthly_summary)
 
             # -------- From analysis_functions --------
             # 8. Big Ticket Expense Tracker (NEW)
-            display_big_ticket_expenses(
-                df_filtered[df_filtered['Amount'] < 0].copy(), # Pass only expenses
-                currency_suffix
-            )
+            big_ticket_expenses_section(expenses, currency_suffix)
             # 9. Category Deep Dive Section (NEW)
             st.markdown("---") # Add a separator
-            category_deep_dive_section(
-                df_filtered[df_filtered['Amount'] < 0].copy(), # Pass only expenses
-                currency_suffix
-            )
+            category_deep_dive_fragment(expenses, currency_suffix)
 
             # 10. Net Worth Snapshot (NEW - Manual)
             st.markdown("---")
-            display_net_worth_snapshot(currency_suffix)
+            net_worth_snapshot_section(currency_suffix)
 
 else:
     st.info("Please load and categorize transaction data using the sidebar.")
@@ -299,5 +329,6 @@ st.sidebar.markdown("---")
 if st.sidebar.button("Clear All Loaded Data", key="clear_data_btn"):
     st.session_state.raw_transactions_df = pd.DataFrame()
     st.session_state.categorized_transactions_df = pd.DataFrame()
+    st.session_state.pop('categorized_df_pandas', None) # Release the converted frame too
     st.session_state.data_loaded_successfully = False
     st.experimental_rerun()
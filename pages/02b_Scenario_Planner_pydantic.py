@@ -13,7 +13,7 @@ import sys
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.append(str(PROJECT_ROOT))
 
-# Import Pydantic models and runner
+# Import Pydantic models (the runner is imported on submit)
 from src.scenario_config_pydantic import (
     ScenarioConfig,
     CashHoldingParams,
@@ -22,19 +22,30 @@ from src.scenario_config_pydantic import (
     IncomeSourceParams,
     MajorExpenseParams
 )
-from src.scenario_runner import run_scenario 
-from src.analysis_functions import calculate_historical_average_annual_living_expenses
+from src.page_helpers import get_categorized_df, sorted_categories, cached_historical_average_living_expenses
 from src.utils import DKK_TO_EUR_RATE#, EUR_TO_DKK_RATE # Make sure these are defined
 
 st.set_page_config(page_title="Scenario Planner", layout="wide")
 st.title("📊 Scenario Planner")
 
+def _with_default_components(cfg: ScenarioConfig) -> ScenarioConfig:
+    """
+    Gives each empty component list one default item, since the form edits item [0] of each.
+    Done once when an editor config is created or loaded, not on every rerun.
+    """
+    if not cfg.cash_holdings: cfg.cash_holdings.append(CashHoldingParams(name="Primary Liquid Cash", initial_amount=cfg.initial_cash_on_hand))
+    if not cfg.income_sources: cfg.income_sources.append(IncomeSourceParams())
+    if not cfg.stock_investments: cfg.stock_investments.append(StockInvestmentParams())
+    if not cfg.real_estate_investments: cfg.real_estate_investments.append(RealEstateParams())
+    if not cfg.major_expenses: cfg.major_expenses.append(MajorExpenseParams())
+    return cfg
+
 # --- Session State Initialization ---
 if 'current_scenario_editor' not in st.session_state:
-    st.session_state.current_scenario_editor = ScenarioConfig()
+    st.session_state.current_scenario_editor = _with_default_components(ScenarioConfig())
 
 if 'scenario_archive' not in st.session_state:
-    st.session_state.scenario_archive = {} 
+    st.session_state.scenario_archive = {} # name -> {'summary', 'results' (pa.Table), 'currency', 'config_json'}
 
 if 'last_run_scenario_name' not in st.session_state:
     st.session_state.last_run_scenario_name = None
@@ -45,17 +56,88 @@ if 'scenarios_to_compare' not in st.session_state:
 if 'use_hist_exp_cb_state' not in st.session_state: # For persisting checkbox
     st.session_state.use_hist_exp_cb_state = True
 
+def _archive_entry(run_config: ScenarioConfig) -> dict:
+    """ Plain-dict archive record for a run: summary, results as an Arrow table, config as JSON. """
+    import pyarrow as pa # Only needed once a run completes
+    results_timeseries_df = run_config.get_results_timeseries_df()
+    summary = run_config.summary_metrics or {}
+    # Numeric columns/metrics resolved once here, not on every rerun of the tables
+    numeric_cols = [] if results_timeseries_df is None else [
+        col for col in results_timeseries_df.select_dtypes(include=np.number).columns if col.lower() != 'year'
+    ]
+    return {
+        'summary': run_config.summary_metrics,
+        'results': pa.Table.from_pandas(results_timeseries_df, preserve_index=False) if results_timeseries_df is not None else None,
+        'results_column_config': _number_column_config(numeric_cols),
+        'summary_numeric_keys': tuple(key for key, value in summary.items() if isinstance(value, (int, float, np.number))),
+        'currency': run_config.scenario_base_currency,
+        'config_json': run_config.model_dump_json(exclude={'results_timeseries_data', 'summary_metrics'}),
+    }
+
+def _results_df(archive_entry: dict) -> Optional[pd.DataFrame]:
+    """ Results DataFrame of an archive entry, converted from Arrow once and kept on the entry. """
+    if archive_entry['results'] is None:
+        return None
+    if '_results_df' not in archive_entry:
+        archive_entry['_results_df'] = archive_entry['results'].to_pandas()
+    return archive_entry['_results_df']
+
+def _pct_slider(model, attr: str, label: str, min_pct: float, max_pct: float, step: float, key: str):
+    """ Percent slider for a fractional model field. Assigns back (and re-validates) only on change. """
+    current_fraction = getattr(model, attr)
+    pct = st.slider(label, min_pct, max_pct, round(current_fraction * 100, 6), step, format="%.2f%%", key=key)
+    if pct / 100 != current_fraction:
+        setattr(model, attr, pct / 100)
+
+def _number_column_config(numeric_cols) -> dict:
+    """ st.dataframe column_config showing the given columns as whole numbers. """
+    return {col: st.column_config.NumberColumn(format="%.0f") for col in numeric_cols}
+
+@st.cache_resource(max_entries=16)
+def _results_chart(results_df: pd.DataFrame, net_worth_cols: tuple, asset_cols: tuple):
+    """ Net worth lines above stacked asset areas, vconcat'ed so the data is embedded once. """
+    import altair as alt
+    base = alt.Chart(results_df).encode(x='Year:Q')
+    panels = []
+    if net_worth_cols:
+        panels.append(
+            base.transform_fold(list(net_worth_cols), as_=['Measure', 'Value']).mark_line().encode(
+                y=alt.Y('Value:Q', title='Net Worth'), color='Measure:N'
+            ).properties(title="Net Worth")
+        )
+    if asset_cols:
+        panels.append(
+            base.transform_fold(list(asset_cols), as_=['Asset', 'Value']).mark_area().encode(
+                y=alt.Y('Value:Q', stack='zero', title='Assets'), color='Asset:N'
+            ).properties(title="Asset Breakdown (Nominal)")
+        )
+    if not panels:
+        return None
+    return alt.vconcat(*panels).resolve_scale(color='independent')
+
 
 # --- Save/Load Utility Functions (using Pydantic) ---
-SAVE_DIR = PROJECT_ROOT / "scenario_json_configs" 
-SAVE_DIR.mkdir(exist_ok=True)
+@st.cache_resource
+def _save_dir() -> Path:
+    """ Scenario definitions folder, created and resolved once per process rather than on every rerun. """
+    save_dir = PROJECT_ROOT / "scenario_json_configs"
+    save_dir.mkdir(exist_ok=True)
+    return save_dir.resolve()
+
+SAVE_DIR = _save_dir()
 
 def save_scenario_definition_pydantic(config: ScenarioConfig, filename: str):
     filepath = SAVE_DIR / f"{filename.strip()}.json"
     try:
-        with open(filepath, 'w') as f:
-            # Exclude results when saving the definition
-            f.write(config.model_dump_json(indent=4, exclude={'results_timeseries_data', 'summary_metrics'}))
+        import orjson # Only needed when saving
+        # Exclude results when saving the definition; orjson writes the (indented) bytes.
+        # Default/None fields are left out too: model_validate_json restores them on load.
+        payload = config.model_dump(
+            mode='json', exclude={'results_timeseries_data', 'summary_metrics'},
+            exclude_defaults=True, exclude_none=True
+        )
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
         st.sidebar.success(f"Scenario definition '{filename}' saved.")
     except Exception as e:
         st.sidebar.error(f"Error saving scenario definition: {e}")
@@ -102,10 +184,7 @@ with st.sidebar:
     # This session state variable is useful for display labels throughout the app
     st.session_state.currency_suffix_scenario = cs_editor.scenario_base_currency
 
-    cs_editor.general_annual_inflation_rate = st.slider(
-        "Assumed Annual Inflation Rate (%)", 0.0, 10.0, 
-        float(cs_editor.general_annual_inflation_rate * 100), 0.1, key="cs_inflation_sidebar" # Ensure float for value
-    ) / 100
+    _pct_slider(cs_editor, 'general_annual_inflation_rate', "Assumed Annual Inflation Rate (%)", 0.0, 10.0, 0.1, key="cs_inflation_sidebar")
 
     st.subheader("Manage Scenario Definitions")
     scenario_filename_input = st.text_input(
@@ -125,12 +204,12 @@ with st.sidebar:
         if scenario_filename_input:
             loaded_config = load_scenario_definition_pydantic(scenario_filename_input)
             if loaded_config:
-                st.session_state.current_scenario_editor = loaded_config
+                st.session_state.current_scenario_editor = _with_default_components(loaded_config)
                 st.session_state.last_run_scenario_name = None 
                 st.experimental_rerun()
         else:
             st.error("Please provide a filename to load.")
-    st.caption(f"Definitions saved in: {SAVE_DIR.resolve()}")
+    st.caption(f"Definitions saved in: {SAVE_DIR}")
     st.markdown("---")
 
 # --- Main Area: Scenario Component Definitions ---
@@ -155,10 +234,11 @@ with st.form(key="scenario_input_form"):
         _base_expense_for_input_field = cs_editor.base_annual_living_expenses or 30000.0
 
         if st.session_state.use_hist_exp_cb_state:
-            # Use raw_transactions_df (assumed DKK) for calculation, then convert
-            historical_transactions_dkk = st.session_state.get('raw_transactions_df', pd.DataFrame())
+            # Use the categorized transactions (assumed DKK) for calculation, then convert
+            # (raw_transactions_df has no 'Category' column, so it can't be used here)
+            historical_transactions_dkk = get_categorized_df()
             if not historical_transactions_dkk.empty and 'Category' in historical_transactions_dkk.columns: # Ensure 'Category' exists
-                all_hist_categories = sorted(historical_transactions_dkk['Category'].unique().tolist())
+                all_hist_categories = sorted_categories(historical_transactions_dkk) # Read from the categorical dtype, no row scan
                 default_excluded_cats = ["Rent/Mortgage", "Investments", "Savings Transfer", "Major Debt Payment", "Uncategorized", "Salary"]
                 # Filter defaults to only those present in actual categories
                 actual_default_excluded = [cat for cat in default_excluded_cats if cat in all_hist_categories]
@@ -168,15 +248,15 @@ with st.form(key="scenario_input_form"):
                     options=all_hist_categories, default=actual_default_excluded, key="form_hist_exp_exclude"
                 )
                 
-                _calculated_hist_avg_dkk = calculate_historical_average_annual_living_expenses(
+                # Cached per (loaded data, exclusions): slider/input changes don't recompute it
+                _calculated_hist_avg_dkk = cached_historical_average_living_expenses(
                     historical_transactions_dkk, 
                     exclude_categories=excluded_cats_input
                 )
 
-                if cs_editor.scenario_base_currency == "EUR":
-                    _base_expense_for_input_field = _calculated_hist_avg_dkk * DKK_TO_EUR_RATE
-                else: # DKK
-                    _base_expense_for_input_field = _calculated_hist_avg_dkk
+                # The average is linear in Amount, so converting the one scalar equals converting every row
+                dkk_to_base_rate = DKK_TO_EUR_RATE if cs_editor.scenario_base_currency == "EUR" else 1.0
+                _base_expense_for_input_field = _calculated_hist_avg_dkk * dkk_to_base_rate
                 
                 st.info(f"Est. hist. avg. annual living expenses: {_base_expense_for_input_field:,.2f} {cs_editor.scenario_base_currency}")
             elif not historical_transactions_dkk.empty and 'Category' not in historical_transactions_dkk.columns:
@@ -198,44 +278,37 @@ with st.form(key="scenario_input_form"):
             help="E.g., -10% for frugality. Applied to the value above.", key="form_exp_adj_slider"
         )
 
-    # --- Initialize Component Lists in Pydantic Model if Empty ---
-    if not cs_editor.cash_holdings: 
-        cs_editor.cash_holdings.append(CashHoldingParams(name="Primary Liquid Cash", initial_amount=cs_editor.initial_cash_on_hand))
-    else: # Update first cash holding to match initial_cash_on_hand
-        cs_editor.cash_holdings[0].initial_amount = cs_editor.initial_cash_on_hand
-        cs_editor.cash_holdings[0].name="Primary Liquid Cash"
-
-    if not cs_editor.income_sources: cs_editor.income_sources.append(IncomeSourceParams())
-    if not cs_editor.stock_investments: cs_editor.stock_investments.append(StockInvestmentParams())
-    if not cs_editor.real_estate_investments: cs_editor.real_estate_investments.append(RealEstateParams())
-    if not cs_editor.major_expenses: cs_editor.major_expenses.append(MajorExpenseParams())
+    # --- Component lists were filled once by _with_default_components (on create/load) ---
+    # Keep the first cash holding in sync with initial_cash_on_hand
+    cs_editor.cash_holdings[0].initial_amount = cs_editor.initial_cash_on_hand
+    cs_editor.cash_holdings[0].name="Primary Liquid Cash"
     
     # --- Component Inputs (Simplified to one of each for now) ---
     with st.expander("📈 Income Source 1", expanded=True):
         inc = cs_editor.income_sources[0]
         inc.name = st.text_input("Name##inc1", value=inc.name, key="form_inc1_name")
         inc.initial_annual_income = st.number_input("Initial Annual Income##inc1", value=float(inc.initial_annual_income), min_value=0.0, format="%.2f", key="form_inc1_amt")
-        inc.expected_annual_growth_rate = st.slider("Annual Growth (%)##inc1", 0.0, 10.0, float(inc.expected_annual_growth_rate*100), 0.1, key="form_inc1_growth") / 100
+        _pct_slider(inc, 'expected_annual_growth_rate', "Annual Growth (%)##inc1", 0.0, 10.0, 0.1, key="form_inc1_growth")
 
     with st.expander("💹 Stock Portfolio 1", expanded=True):
         stock = cs_editor.stock_investments[0]
         stock.name = st.text_input("Name##stock1", value=stock.name, key="form_stock1_name")
         stock.initial_investment = st.number_input("Initial##stock1", value=float(stock.initial_investment), min_value=0.0, format="%.2f", key="form_stock1_init")
         stock.annual_contribution = st.number_input("Annual Contribution##stock1", value=float(stock.annual_contribution), min_value=0.0, format="%.2f", key="form_stock1_contrib")
-        stock.expected_annual_return = st.slider("Expected Return (%)##stock1", 0.0, 20.0, float(stock.expected_annual_return*100), 0.1, key="form_stock1_ret") / 100
+        _pct_slider(stock, 'expected_annual_return', "Expected Return (%)##stock1", 0.0, 20.0, 0.1, key="form_stock1_ret")
 
     with st.expander("🏡 Real Estate Property 1", expanded=False):
         prop = cs_editor.real_estate_investments[0]
         prop.name = st.text_input("Property Nickname##prop1", value=prop.name, key="form_prop1_name")
         prop.purchase_price = st.number_input("Purchase Price##prop1", value=float(prop.purchase_price), format="%.2f", key="form_prop1_price")
-        prop.down_payment_pct = st.slider("Down Payment (%)##prop1", 0.0, 100.0, float(prop.down_payment_pct * 100), 1.0, key="form_prop1_dppct") / 100
+        _pct_slider(prop, 'down_payment_pct', "Down Payment (%)##prop1", 0.0, 100.0, 1.0, key="form_prop1_dppct")
         prop.mortgage_term_years = st.number_input("Mortgage Term (Years)##prop1", min_value=1, max_value=50, value=int(prop.mortgage_term_years), step=1, key="form_prop1_term")
-        prop.mortgage_interest_rate_annual = st.slider("Mortgage Rate (%)##prop1", 0.0, 15.0, float(prop.mortgage_interest_rate_annual * 100), 0.05, key="form_prop1_rate") / 100
-        prop.expected_annual_appreciation = st.slider("Property Appreciation (%)##prop1", -5.0, 15.0, float(prop.expected_annual_appreciation * 100), 0.1, key="form_prop1_apprec") / 100
-        prop.property_tax_annual_pct_value = st.slider("Property Tax (% of Value)##prop1", 0.0, 5.0, float(prop.property_tax_annual_pct_value * 100), 0.01, key="form_prop1_tax") / 100
+        _pct_slider(prop, 'mortgage_interest_rate_annual', "Mortgage Rate (%)##prop1", 0.0, 15.0, 0.05, key="form_prop1_rate")
+        _pct_slider(prop, 'expected_annual_appreciation', "Property Appreciation (%)##prop1", -5.0, 15.0, 0.1, key="form_prop1_apprec")
+        _pct_slider(prop, 'property_tax_annual_pct_value', "Property Tax (% of Value)##prop1", 0.0, 5.0, 0.01, key="form_prop1_tax")
         prop.insurance_annual_fixed = st.number_input("Annual Insurance##prop1", value=float(prop.insurance_annual_fixed), format="%.2f", key="form_prop1_ins")
-        prop.maintenance_annual_pct_value = st.slider("Maintenance (% of Value)##prop1", 0.0, 5.0, float(prop.maintenance_annual_pct_value * 100), 0.1, key="form_prop1_maint") / 100
-        prop.selling_costs_pct = st.slider("Selling Costs (% of Value)##prop1", 0.0, 10.0, float(prop.selling_costs_pct * 100), 0.5, key="form_prop1_sellcost") / 100
+        _pct_slider(prop, 'maintenance_annual_pct_value', "Maintenance (% of Value)##prop1", 0.0, 5.0, 0.1, key="form_prop1_maint")
+        _pct_slider(prop, 'selling_costs_pct', "Selling Costs (% of Value)##prop1", 0.0, 10.0, 0.5, key="form_prop1_sellcost")
         
         prop_type_options = ["Not Used / Investment Only", "Primary Residence", "Rental Property"]
         current_prop_type_index = 0
@@ -249,8 +322,8 @@ with st.form(key="scenario_input_form"):
             prop.equivalent_monthly_rent_saved = st.number_input("Equivalent Monthly Rent Saved##prop1", value=float(prop.equivalent_monthly_rent_saved), format="%.2f", key="form_prop1_rentsaved")
         if prop.is_rental:
             prop.monthly_rent_income = st.number_input("Gross Monthly Rent##prop1", value=float(prop.monthly_rent_income), format="%.2f", key="form_prop1_rentincome")
-            prop.vacancy_rate_pct = st.slider("Vacancy Rate (%)##prop1", 0.0, 50.0, float(prop.vacancy_rate_pct * 100), 1.0, key="form_prop1_vacancy") / 100
-            prop.management_fee_pct_rent = st.slider("Management Fee (% Rent)##prop1", 0.0, 20.0, float(prop.management_fee_pct_rent * 100), 0.5, key="form_prop1_mgmtfee") / 100
+            _pct_slider(prop, 'vacancy_rate_pct', "Vacancy Rate (%)##prop1", 0.0, 50.0, 1.0, key="form_prop1_vacancy")
+            _pct_slider(prop, 'management_fee_pct_rent', "Management Fee (% Rent)##prop1", 0.0, 20.0, 0.5, key="form_prop1_mgmtfee")
 
     with st.expander("💸 Major Expense 1", expanded=False):
         maj_exp = cs_editor.major_expenses[0]
@@ -267,184 +340,179 @@ if submitted_form:
     # At this point, cs_editor (st.session_state.current_scenario_editor)
     # has been updated by all the widgets inside the form.
     
-    # Create a final config object for the run, applying the expense adjustment
-    config_to_run_dict = cs_editor.model_dump() # Get a dict from the editor's state
-    
     # Apply the expense adjustment from the form's slider value
     # base_annual_living_expenses_form_val was the value in the number_input at submission
     # expense_adjustment_pct_form_val was the value in the slider at submission
     adjusted_base_living_expenses = base_annual_living_expenses_form_val * (1 + expense_adjustment_pct_form_val / 100)
-    config_to_run_dict['base_annual_living_expenses'] = adjusted_base_living_expenses
-    
-    try:
-        config_to_run = ScenarioConfig.model_validate(config_to_run_dict) # Create validated Pydantic model
-    except Exception as e_val:
-        st.error(f"Input Validation Error when preparing scenario for run: {e_val}")
-        st.stop()
 
-    with st.spinner("Calculating..."):
-        run_config_with_results = run_scenario(config_to_run)
-        st.session_state.last_run_scenario_name = run_config_with_results.name
-        st.session_state.scenario_archive[run_config_with_results.name] = run_config_with_results
-    st.success("Scenario projection complete!")
+    # Create a final config object for the run: a copy of the editor state with the adjusted expenses,
+    # instead of a model_dump() -> model_validate() round trip over every nested field. The editor is
+    # already valid: ScenarioConfig and every component model validate on assignment.
+    # Deep copy so later edits to the editor's components don't leak into the archived run.
+    config_to_run = cs_editor.model_copy(
+        update={'base_annual_living_expenses': adjusted_base_living_expenses}, deep=True
+    )
+
+    from src.scenario_runner import run_scenario # Deferred: the projection code is only needed on submit
+    with st.status("Calculating...") as run_status:
+        try:
+            run_config_with_results = run_scenario(config_to_run)
+        except Exception as e_run:
+            run_status.update(label="Scenario projection failed.", state="error")
+            st.error(f"Error while running the scenario: {e_run}")
+        else:
+            st.session_state.last_run_scenario_name = run_config_with_results.name
+            st.session_state.scenario_archive[run_config_with_results.name] = _archive_entry(run_config_with_results)
+            run_status.update(label="Scenario projection complete!", state="complete")
 
 # --- Display Results (for the last run scenario) ---
-if st.session_state.last_run_scenario_name and \
-   st.session_state.last_run_scenario_name in st.session_state.scenario_archive:
+# Results and comparison run as fragments: their radio/checkbox/multiselect rerun only the
+# section itself, not the form and the historical-expense work above.
+@st.experimental_fragment
+def _results_section():
+    if st.session_state.last_run_scenario_name and \
+       st.session_state.last_run_scenario_name in st.session_state.scenario_archive:
     
-    st.header(f"Results for: {st.session_state.last_run_scenario_name}")
+        st.header(f"Results for: {st.session_state.last_run_scenario_name}")
     
-    results_config = st.session_state.scenario_archive[st.session_state.last_run_scenario_name]
-    results_df = results_config.get_results_timeseries_df() 
-    current_display_currency = results_config.scenario_base_currency
-
-    if results_config.summary_metrics:
-        st.subheader("Summary")
-        summary = results_config.summary_metrics
-        cols_summary = st.columns(3)
-        cols_summary[0].metric("Horizon (Years)", f"{summary.get('Horizon_Years', 'N/A')}")
-        cols_summary[1].metric(f"Ending Net Worth (Nominal {current_display_currency})", 
-                               f"{summary.get('Ending_Net_Worth_Nominal', 0):,.0f}")
-        cols_summary[2].metric(f"Ending Net Worth (Real {current_display_currency})", 
-                               f"{summary.get('Ending_Net_Worth_Real', 0):,.0f}")
-
-    if results_df is not None and not results_df.empty:
-        st.subheader("Projected Net Worth Over Time")
-        # Radio button for Nominal vs Real
-        nw_display_options = ("Nominal Value", f"Real Value (Today's {current_display_currency})")
-        # Ensure index is valid for radio button based on a persistent state or default
-        if 'nw_display_type_index' not in st.session_state: st.session_state.nw_display_type_index = 0
+        archived_run = st.session_state.scenario_archive[st.session_state.last_run_scenario_name]
+        results_df = _results_df(archived_run)
+        current_display_currency = archived_run['currency']
+
+        if archived_run['summary']:
+            st.subheader("Summary")
+            summary = archived_run['summary']
+            cols_summary = st.columns(3)
+            cols_summary[0].metric("Horizon (Years)", f"{summary.get('Horizon_Years', 'N/A')}")
+            cols_summary[1].metric(f"Ending Net Worth (Nominal {current_display_currency})", 
+                                   f"{summary.get('Ending_Net_Worth_Nominal', 0):,.0f}")
+            cols_summary[2].metric(f"Ending Net Worth (Real {current_display_currency})", 
+                                   f"{summary.get('Ending_Net_Worth_Real', 0):,.0f}")
+
+        if results_df is not None and not results_df.empty:
+            st.subheader("Projected Net Worth Over Time")
+            # Radio button for Nominal vs Real
+            nw_display_options = ("Nominal Value", f"Real Value (Today's {current_display_currency})")
+            # The radio is keyed on the index itself, so the choice persists without a manual write-back
+            if 'nw_display_type_index' not in st.session_state: st.session_state.nw_display_type_index = 0
         
-        selected_nw_display = st.radio(
-            "Display Net Worth As:", nw_display_options, 
-            index=st.session_state.nw_display_type_index, 
-            key="nw_radio_select"
-        )
-        st.session_state.nw_display_type_index = nw_display_options.index(selected_nw_display)
-
+            selected_nw_index = st.radio(
+                "Display Net Worth As:", range(len(nw_display_options)), 
+                format_func=nw_display_options.__getitem__,
+                key="nw_display_type_index"
+            )
 
-        if selected_nw_display == nw_display_options[0]: # Nominal
-            if 'Net_Worth_Nominal' in results_df.columns:
-                st.line_chart(results_df.set_index('Year')['Net_Worth_Nominal'])
-            else: st.warning("Nominal Net Worth data missing.")
-        else: # Real
-            if 'Net_Worth_Real' in results_df.columns:
-                st.line_chart(results_df.set_index('Year')['Net_Worth_Real'])
-            else: st.warning("Real Net Worth data missing.")
 
-        if st.checkbox("Show Nominal & Real Net Worth Together?", value=False, key="nw_both_cb_results"):
-            if 'Net_Worth_Nominal' in results_df.columns and 'Net_Worth_Real' in results_df.columns:
-                st.line_chart(results_df.set_index('Year')[['Net_Worth_Nominal', 'Net_Worth_Real']])
+            if st.checkbox("Show Nominal & Real Net Worth Together?", value=False, key="nw_both_cb_results"):
+                net_worth_cols = ['Net_Worth_Nominal', 'Net_Worth_Real']
+            else:
+                net_worth_cols = [('Net_Worth_Nominal', 'Net_Worth_Real')[selected_nw_index]]
+            missing_nw_cols = [col for col in net_worth_cols if col not in results_df.columns]
+            if missing_nw_cols:
+                st.warning(f"Net worth data missing: {missing_nw_cols}")
 
-        st.subheader("Projected Asset Breakdown (Nominal)")
-        asset_cols_nominal = ['Assets_Cash_Nominal', 'Assets_Stocks_Nominal', 'Assets_RealEstate_Equity_Nominal']
-        
-        if all(col in results_df.columns for col in asset_cols_nominal) and 'Year' in results_df.columns:
-            df_for_area_chart = results_df.set_index('Year')[asset_cols_nominal].copy()
-            for col in asset_cols_nominal: 
-                df_for_area_chart[col] = pd.to_numeric(df_for_area_chart[col], errors='coerce').fillna(0)
-            st.area_chart(df_for_area_chart)
-        else:
+            asset_cols_nominal = ['Assets_Cash_Nominal', 'Assets_Stocks_Nominal', 'Assets_RealEstate_Equity_Nominal']
             missing_asset_cols = [col for col in asset_cols_nominal if col not in results_df.columns]
-            st.warning(f"Asset breakdown columns missing for plotting: {missing_asset_cols}")
+            if missing_asset_cols:
+                st.warning(f"Asset breakdown columns missing for plotting: {missing_asset_cols}")
+
+            # Net worth and asset breakdown as one Altair chart over the same data (one payload, not one per chart)
+            if 'Year' in results_df.columns:
+                results_chart = _results_chart(
+                    results_df,
+                    tuple(col for col in net_worth_cols if col not in missing_nw_cols),
+                    tuple(asset_cols_nominal) if not missing_asset_cols else ()
+                )
+                if results_chart is not None:
+                    st.altair_chart(results_chart, use_container_width=True)
         
-        with st.expander("View Detailed Results Table for Last Run"):
-            # Select numeric columns for formatting, excluding 'Year' if it's float/int by mistake
-            numeric_cols_to_format = [
-                col for col in results_df.select_dtypes(include=np.number).columns 
-                if col.lower() != 'year' # Exclude 'Year' from general numeric formatting if it's just an int
-            ]
-            format_dict = {col: "{:,.0f}" for col in numeric_cols_to_format}
-            if 'Year' in results_df.columns and pd.api.types.is_numeric_dtype(results_df['Year']):
-                 format_dict['Year'] = "{:.0f}" # Format Year if it's numeric (e.g. int)
-
-            st.dataframe(results_df.style.format(format_dict, na_rep="-"))
+            with st.expander("View Detailed Results Table for Last Run"):
+                # Formatted on the frontend via column_config (no Python-side Styler pass over every cell);
+                # the config is built once when the run is archived
+                st.dataframe(results_df, column_config=archived_run['results_column_config'], hide_index=True)
+        else:
+            st.info(f"No detailed results to display. Run the scenario.")
     else:
-        st.info(f"No detailed results to display. Run the scenario.")
-else:
-    st.info("Define and run a scenario using the form. Previously run scenarios can be compared below.")
+        st.info("Define and run a scenario using the form. Previously run scenarios can be compared below.")
+
+
+_results_section()
 
 # --- Scenario Comparison Section (at the bottom of the main page or new page) ---
 st.markdown("---")
 st.header("⚖️ Compare Scenarios")
 
 
-if st.session_state.scenario_archive:
-    scenario_names_in_archive = list(st.session_state.scenario_archive.keys())
+@st.experimental_fragment
+def _compare_section():
+    if st.session_state.scenario_archive:
+        scenario_names_in_archive = list(st.session_state.scenario_archive.keys())
     
-    selected_for_comparison = st.multiselect( 
-        "Select scenarios to compare (from run/archived):",
-        options=scenario_names_in_archive,
-        default=st.session_state.scenarios_to_compare, 
-        key="compare_multi_select"
-    )
-    if selected_for_comparison != st.session_state.scenarios_to_compare:
-        st.session_state.scenarios_to_compare = selected_for_comparison
-        st.experimental_rerun()
+        # Keyed on the session state list itself: the widget change rerun is enough, no extra rerun
+        st.multiselect( 
+            "Select scenarios to compare (from run/archived):",
+            options=scenario_names_in_archive,
+            key="scenarios_to_compare"
+        )
 
 
-    if len(st.session_state.scenarios_to_compare) >= 1:
-        comparison_data_nominal = []
-        comparison_data_real = []
-        summary_comparison_list = []
+        if len(st.session_state.scenarios_to_compare) >= 1:
+            compare_results = {} # scenario name -> results DataFrame
+            summary_by_name = {} # scenario name -> summary metrics
+            summary_numeric_keys = {} # Ordered set of numeric metric names, from the archive entries
 
-        for scenario_name in st.session_state.scenarios_to_compare:
-            archived_sc_config = st.session_state.scenario_archive.get(scenario_name) # Get the Pydantic object
+            for scenario_name in st.session_state.scenarios_to_compare:
+                archived_run_compare = st.session_state.scenario_archive.get(scenario_name) # Plain-dict archive entry
             
-            if archived_sc_config: # Make sure we found the scenario config
-                results_df_compare = archived_sc_config.get_results_timeseries_df() # Use the correct method
+                if archived_run_compare: # Make sure we found the scenario
+                    results_df_compare = _results_df(archived_run_compare)
                 
-                if results_df_compare is not None and not results_df_compare.empty:
-                    # For Net Worth line chart (Nominal)
-                    if 'Year' in results_df_compare.columns and 'Net_Worth_Nominal' in results_df_compare.columns:
-                        df_nom = results_df_compare[['Year', 'Net_Worth_Nominal']].copy()
-                        df_nom.rename(columns={'Net_Worth_Nominal': scenario_name}, inplace=True)
-                        comparison_data_nominal.append(df_nom.set_index('Year'))
-                    
-                    # For Net Worth line chart (Real)
-                    if 'Year' in results_df_compare.columns and 'Net_Worth_Real' in results_df_compare.columns:
-                        df_real = results_df_compare[['Year', 'Net_Worth_Real']].copy()
-                        df_real.rename(columns={'Net_Worth_Real': scenario_name}, inplace=True)
-                        comparison_data_real.append(df_real.set_index('Year'))
+                    if results_df_compare is not None and not results_df_compare.empty:
+                        if 'Year' in results_df_compare.columns:
+                            compare_results[scenario_name] = results_df_compare
                     
-                    # For summary table
-                    if archived_sc_config.summary_metrics:
-                        # Add scenario name to summary metrics if it's not already a key (like 'Scenario_Name')
-                        # This is good practice if summary_metrics dict itself doesn't contain the name
-                        metrics_to_add = archived_sc_config.summary_metrics.copy()
-                        if 'Scenario_Name' not in metrics_to_add : # Ensure Scenario_Name is present for DataFrame index
-                            metrics_to_add['Scenario_Name'] = scenario_name
-                        summary_comparison_list.append(metrics_to_add)
+                        # For summary table
+                        if archived_run_compare['summary']:
+                            summary_by_name[scenario_name] = archived_run_compare['summary']
+                            summary_numeric_keys.update(dict.fromkeys(archived_run_compare['summary_numeric_keys']))
+                    else:
+                        st.warning(f"No results data found within the archived scenario: '{scenario_name}'")
                 else:
-                    st.warning(f"No results data found within the archived scenario: '{scenario_name}'")
-            else:
-                st.warning(f"Could not find archived scenario: '{scenario_name}'")
-
-
-        if comparison_data_nominal:
-            st.subheader("Comparison: Net Worth Over Time (Nominal)")
-            # Concatenate DataFrames: ensure they have the same index ('Year')
-            # If a scenario is shorter than others, concat will fill with NaN, which is fine for plotting
-            final_nominal_df = pd.concat(comparison_data_nominal, axis=1) 
-            st.line_chart(final_nominal_df)
+                    st.warning(f"Could not find archived scenario: '{scenario_name}'")
+
+
+            # One preallocated Year x scenario frame per measure, filled column by column.
+            # A scenario with a shorter horizon leaves NaN in the later years, which is fine for plotting.
+            all_years = sorted({year for df in compare_results.values() for year in df['Year']})
+            comparison_frames = {}
+            for measure in ('Net_Worth_Nominal', 'Net_Worth_Real'):
+                names_with_measure = [name for name, df in compare_results.items() if measure in df.columns]
+                if not names_with_measure:
+                    continue
+                wide_df = pd.DataFrame(index=pd.Index(all_years, name='Year'), columns=names_with_measure, dtype='float64')
+                for name in names_with_measure:
+                    wide_df.loc[compare_results[name]['Year'].to_numpy(), name] = compare_results[name][measure].to_numpy()
+                comparison_frames[measure] = wide_df
+
+            if 'Net_Worth_Nominal' in comparison_frames:
+                st.subheader("Comparison: Net Worth Over Time (Nominal)")
+                st.line_chart(comparison_frames['Net_Worth_Nominal'])
         
-        if comparison_data_real:
-            st.subheader("Comparison: Net Worth Over Time (Real - Today's Value)")
-            final_real_df = pd.concat(comparison_data_real, axis=1)
-            st.line_chart(final_real_df)
-
-        if summary_comparison_list:
-            st.subheader("Comparison: Summary Metrics")
-            # Check if 'Scenario_Name' exists before setting as index
-            if all('Scenario_Name' in item for item in summary_comparison_list):
-                summary_df_compare = pd.DataFrame(summary_comparison_list).set_index('Scenario_Name')
-                # Select only numeric columns for formatting, or format specific ones
-                numeric_cols_summary = summary_df_compare.select_dtypes(include=np.number).columns
-                st.dataframe(summary_df_compare.style.format("{:,.0f}", subset=numeric_cols_summary))
-            else:
-                st.dataframe(pd.DataFrame(summary_comparison_list)) # Display without index if name missing
+            if 'Net_Worth_Real' in comparison_frames:
+                st.subheader("Comparison: Net Worth Over Time (Real - Today's Value)")
+                st.line_chart(comparison_frames['Net_Worth_Real'])
+
+            if summary_by_name:
+                st.subheader("Comparison: Summary Metrics")
+                # One row per scenario, indexed by the archive name (the 'Scenario_Name' metric repeats it)
+                summary_df_compare = pd.DataFrame.from_dict(summary_by_name, orient='index').drop(columns='Scenario_Name', errors='ignore')
+                summary_df_compare.index.name = 'Scenario_Name'
+                numeric_cols_summary = [key for key in summary_numeric_keys if key in summary_df_compare.columns]
+                st.dataframe(summary_df_compare, column_config=_number_column_config(numeric_cols_summary))
             
+        else:
+            st.info("Select at least one scenario from the archive to compare.")
     else:
-        st.info("Select at least one scenario from the archive to compare.")
-else:
-    st.info("No scenarios have been run and archived in this session yet. Run a scenario to enable comparison.")
\ No newline at end of file
+        st.info("No scenarios have been run and archived in this session yet. Run a scenario to enable comparison.")
+
+_compare_section()
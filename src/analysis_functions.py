@@ -14,7 +14,10 @@ def display_big_ticket_expenses(df_expenses, currency_suffix):
     # Default to a reasonable value, e.g., 500
     # Max value can be dynamic based on max expense if desired
     default_threshold = 500.0
-    max_abs_expense = df_expenses['Amount'].abs().max() if not df_expenses.empty else default_threshold * 2
+    # Largest |Amount| straight off the float32 values (df_expenses is non-empty here); never below
+    # the default, which number_input requires (value <= max_value)
+    largest_abs = np.nanmax(np.abs(df_expenses['Amount'].to_numpy()))
+    max_abs_expense = default_threshold if np.isnan(largest_abs) else max(float(largest_abs), default_threshold)
     
     threshold = st.number_input(
         f"Show expenses greater than ({currency_suffix}):", 
@@ -25,21 +28,36 @@ def display_big_ticket_expenses(df_expenses, currency_suffix):
         key="big_ticket_threshold"
     )
 
-    df_exp_copy = df_expenses.copy()
-    # Ensure Amount is numeric
-    df_exp_copy['Amount'] = pd.to_numeric(df_exp_copy['Amount'], errors='coerce')
-    
-    big_expenses = df_exp_copy[df_exp_copy['Amount'].abs() > threshold]
+    # Filter the original frame with an |Amount| mask (no full copy per threshold change);
+    # Amount is float32 already (ensure_expense_schema), so abs() is one cheap pass
+    big_expenses = df_expenses.loc[df_expenses['Amount'].abs() > threshold, ['Date', 'Description', 'Amount', 'Category']]
     
     if not big_expenses.empty:
         st.write(f"Found {len(big_expenses)} expenses exceeding {threshold:.2f} {currency_suffix}:")
         st.dataframe(
-            big_expenses[['Date', 'Description', 'Amount', 'Category']].sort_values(by='Amount') # Sort by smallest (most negative)
+            big_expenses.sort_values(by='Amount') # Sort by smallest (most negative)
             .style.format({'Amount': "{:.2f}"})
         )
     else:
         st.write(f"No expenses found exceeding {threshold:.2f} {currency_suffix} in the selected period.")
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def _category_monthly_wide(df_expenses: pd.DataFrame) -> pd.DataFrame:
+    """
+    Month-end x category table of absolute spend, built once for all categories (cached on the data).
+    Each column spans that category's own first..last month (NaN outside), like a per-category resample.
+    """
+    # Date/Amount are typed and non-null upstream (ensure_expense_schema): no coercion or masks here
+    by_date = pd.DataFrame({
+        'Category': df_expenses['Category'],
+        'Absolute_Amount': df_expenses['Amount'].abs(),
+    }).set_axis(pd.DatetimeIndex(df_expenses['Date'], name='Date'))
+    return (
+        by_date.groupby('Category', observed=True)['Absolute_Amount']
+        .resample('ME').sum()
+        .unstack(level=0)
+    )
+
 def category_deep_dive_section(df_expenses, currency_suffix):
     """Provides a detailed analysis for a user-selected expense category."""
     if df_expenses.empty:
@@ -62,77 +80,83 @@ def category_deep_dive_section(df_expenses, currency_suffix):
     if selected_category:
         st.subheader(f"Analysis for: {selected_category}")
         
-        cat_df = df_expenses[df_expenses['Category'] == selected_category].copy()
-        if cat_df.empty:
+        cat_rows = df_expenses['Category'] == selected_category
+        if not cat_rows.any():
             st.write(f"No transactions found for '{selected_category}' in the selected period.")
             return
 
-        cat_df['Date'] = pd.to_datetime(cat_df['Date'], errors='coerce')
-        cat_df = cat_df.dropna(subset=['Date'])
-        if cat_df.empty:
+        # Switching category only reads one column of the cached all-category table
+        monthly_by_category = _category_monthly_wide(df_expenses)
+        if selected_category not in monthly_by_category.columns:
             st.write(f"No valid date data for '{selected_category}'.")
             return
             
-        cat_df['Absolute_Amount'] = pd.to_numeric(cat_df['Amount'], errors='coerce').abs().fillna(0)
-        cat_df.set_index('Date', inplace=True) # For resampling
-
         # a. Trend of spending in that category over time (line chart)
         st.markdown("##### Monthly Spending Trend")
-        monthly_spend_cat = cat_df.resample('ME')['Absolute_Amount'].sum().reset_index()
-        if not monthly_spend_cat.empty:
-            st.line_chart(monthly_spend_cat.set_index('Date')['Absolute_Amount'])
+        # Kept as a Date-indexed Series throughout (charts and rolling use it directly, no reset/set_index)
+        monthly_spend_cat = monthly_by_category[selected_category].dropna().rename('Absolute_Amount')
+        # Plain numpy arrays for the scalar reads below (no pandas getitem per value)
+        spend_values = monthly_spend_cat.to_numpy()
+        month_ends = monthly_spend_cat.index.to_numpy()
+        if spend_values.size > 0:
+            st.line_chart(monthly_spend_cat)
         else:
             st.write("No monthly spending data for this category.")
 
         # b. List of all transactions in that category for the selected period
         with st.expander("View All Transactions for this Category"):
             st.dataframe(
-                cat_df.reset_index()[['Date', 'Description', 'Amount']] # Reset index to show Date as column
+                df_expenses.loc[cat_rows, ['Date', 'Description', 'Amount']]
                 .sort_values(by='Date', ascending=False)
                 .style.format({'Amount': "{:.2f}"})
             )
 
         # c. Average monthly spend in that category
-        if not monthly_spend_cat.empty:
-            avg_monthly_spend = monthly_spend_cat['Absolute_Amount'].mean()
+        if spend_values.size > 0:
+            avg_monthly_spend = spend_values.mean()
             st.metric(f"Average Monthly Spend in {selected_category}", f"{avg_monthly_spend:.2f} {currency_suffix}")
         
         # d. Comparison to the previous period (e.g., current month vs. last month)
         #    This requires at least two months of data for the category.
-        if len(monthly_spend_cat) >= 2:
-            latest_month_spend = monthly_spend_cat['Absolute_Amount'].iloc[-1]
-            previous_month_spend = monthly_spend_cat['Absolute_Amount'].iloc[-2]
+        if spend_values.size >= 2:
+            latest_month_spend = spend_values[-1]
+            previous_month_spend = spend_values[-2]
+            comparison_label = f"Spend in {pd.Timestamp(month_ends[-1]):%B %Y} vs. {pd.Timestamp(month_ends[-2]):%B %Y}"
             
             if previous_month_spend > 0: # Avoid division by zero
                 pct_change = ((latest_month_spend - previous_month_spend) / previous_month_spend) * 100
                 change_text = f"{pct_change:+.1f}%" # Format with sign
                 delta_color = "inverse" if pct_change < 0 else "normal" # Green for decrease in expense
                 st.metric(
-                    f"Spend in {monthly_spend_cat['Date'].iloc[-1]:%B %Y} vs. {monthly_spend_cat['Date'].iloc[-2]:%B %Y}",
+                    comparison_label,
                     f"{latest_month_spend:.2f} {currency_suffix}",
                     delta=change_text,
                     delta_color=delta_color
                 )
             elif latest_month_spend > 0 and previous_month_spend == 0:
                  st.metric(
-                    f"Spend in {monthly_spend_cat['Date'].iloc[-1]:%B %Y} vs. {monthly_spend_cat['Date'].iloc[-2]:%B %Y}",
+                    comparison_label,
                     f"{latest_month_spend:.2f} {currency_suffix}",
                     delta="New spending (was 0)"
                 )
             # Add more conditions as needed (e.g. what if latest is 0 and prev was > 0)
-        elif len(monthly_spend_cat) == 1:
+        elif spend_values.size == 1:
             st.write("Only one month of data available for this category; cannot compare to previous month.")
 
 
         # e. Rolling Averages (for this specific category)
         st.markdown("##### Rolling Average Spending (3-Month)")
-        if len(monthly_spend_cat) >= 3:
-            monthly_spend_cat_indexed = monthly_spend_cat.set_index('Date')
-            monthly_spend_cat_indexed['Rolling_Avg_3M'] = monthly_spend_cat_indexed['Absolute_Amount'].rolling(window=3, min_periods=1).mean()
-            st.line_chart(monthly_spend_cat_indexed[['Absolute_Amount', 'Rolling_Avg_3M']])
+        if spend_values.size >= 3:
+            st.line_chart(pd.DataFrame({
+                'Absolute_Amount': monthly_spend_cat,
+                'Rolling_Avg_3M': monthly_spend_cat.rolling(window=3, min_periods=1).mean()
+            }))
         else:
             st.write("Not enough data (at least 3 months) for a 3-month rolling average.")
 
+NET_WORTH_ASSET_ITEMS = ["Cash & Savings Accounts", "Investments (Stocks, ETFs, etc.)", "Real Estate Value", "Other Assets"]
+NET_WORTH_LIABILITY_ITEMS = ["Mortgage Debt", "Other Loans (Car, Student, etc.)", "Credit Card Debt"]
+
 def display_net_worth_snapshot(currency_suffix):
     """Simple manual input for net worth calculation."""
     st.header("Net Worth Snapshot (Manual Input)")
@@ -142,22 +166,27 @@ def display_net_worth_snapshot(currency_suffix):
         "The 'Account Balance Trend' already shows your tracked bank balances."
     )
     
+    # One editable table per side instead of a number_input per item (rows can be added too)
+    amount_column_config = {
+        'Amount': st.column_config.NumberColumn(f"Amount ({currency_suffix})", min_value=0.0, format="%.2f")
+    }
     cols_nw = st.columns(2)
     with cols_nw[0]:
         st.subheader("Assets")
-        cash_savings = st.number_input(f"Cash & Savings Accounts ({currency_suffix})", min_value=0.0, value=0.0, step=1000.0, key="nw_cash")
-        investments = st.number_input(f"Investments (Stocks, ETFs, etc.) ({currency_suffix})", min_value=0.0, value=0.0, step=1000.0, key="nw_invest")
-        property_value = st.number_input(f"Real Estate Value ({currency_suffix})", min_value=0.0, value=0.0, step=10000.0, key="nw_property")
-        other_assets = st.number_input(f"Other Assets ({currency_suffix})", min_value=0.0, value=0.0, step=100.0, key="nw_other_assets")
-        total_assets = cash_savings + investments + property_value + other_assets
+        assets_df = st.data_editor(
+            pd.DataFrame({'Item': NET_WORTH_ASSET_ITEMS, 'Amount': [0.0] * len(NET_WORTH_ASSET_ITEMS)}),
+            column_config=amount_column_config, num_rows="dynamic", hide_index=True, key="nw_assets"
+        )
+        total_assets = float(assets_df['Amount'].sum()) # sum() skips the empty cells of added rows
         st.metric("Total Assets", f"{total_assets:.2f} {currency_suffix}")
 
     with cols_nw[1]:
         st.subheader("Liabilities")
-        mortgage_debt = st.number_input(f"Mortgage Debt ({currency_suffix})", min_value=0.0, value=0.0, step=1000.0, key="nw_mortgage")
-        other_loans = st.number_input(f"Other Loans (Car, Student, etc.) ({currency_suffix})", min_value=0.0, value=0.0, step=100.0, key="nw_other_loans")
-        credit_card_debt = st.number_input(f"Credit Card Debt ({currency_suffix})", min_value=0.0, value=0.0, step=10.0, key="nw_cc_debt")
-        total_liabilities = mortgage_debt + other_loans + credit_card_debt
+        liabilities_df = st.data_editor(
+            pd.DataFrame({'Item': NET_WORTH_LIABILITY_ITEMS, 'Amount': [0.0] * len(NET_WORTH_LIABILITY_ITEMS)}),
+            column_config=amount_column_config, num_rows="dynamic", hide_index=True, key="nw_liabilities"
+        )
+        total_liabilities = float(liabilities_df['Amount'].sum())
         st.metric("Total Liabilities", f"{total_liabilities:.2f} {currency_suffix}")
         
     st.markdown("---")
@@ -167,29 +196,32 @@ def display_net_worth_snapshot(currency_suffix):
 
 def calculate_historical_average_annual_living_expenses(
     categorized_df: pd.DataFrame, 
-    exclude_categories: list = None
+    exclude_categories: tuple = None
 ) -> float:
     """
     Calculates average annual living expenses from historical categorized transactions.
     Excludes specified categories (e.g., mortgage, large investments).
+    Not cached itself: the pages go through page_helpers.cached_historical_average_living_expenses,
+    which caches on the data token instead of hashing the frame.
     """
     if categorized_df.empty:
         return 0.0
     if exclude_categories is None:
         exclude_categories = []
 
-    expenses_df = categorized_df[categorized_df['Amount'] < 0].copy()
-    
-    # Filter out explicitly excluded categories
-    expenses_df = expenses_df[~expenses_df['Category'].isin(exclude_categories)]
-    
-    expenses_df['Date'] = pd.to_datetime(expenses_df['Date'])
-    expenses_df['YearMonth'] = expenses_df['Date'].dt.to_period('M')
-    
-    monthly_total_expenses = expenses_df.groupby('YearMonth')['Amount'].sum().abs()
-    
-    if monthly_total_expenses.empty:
+    # One combined mask and only the two columns needed (no filtered copy of the whole frame)
+    amounts = categorized_df['Amount']
+    expense_mask = (amounts < 0) & ~categorized_df['Category'].isin(exclude_categories)
+
+    # Bin by month on integer datetime64[M] keys + bincount (no Period object per row, no groupby)
+    month_keys = categorized_df.loc[expense_mask, 'Date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    has_date = ~np.isnat(month_keys)
+    if not has_date.any():
         return 0.0
-        
-    average_monthly_expense = monthly_total_expenses.mean()
-    return average_monthly_expense * 12
\ No newline at end of file
+    month_idx = month_keys[has_date].view('i8')
+    month_idx = month_idx - month_idx.min()
+    monthly_sums = np.bincount(month_idx, weights=amounts[expense_mask].to_numpy(dtype='float64')[has_date])
+    months_present = np.bincount(month_idx) > 0 # Only months with expenses count, as with a groupby
+
+    average_monthly_expense = np.abs(monthly_sums[months_present]).mean()
+    return float(average_monthly_expense * 12)
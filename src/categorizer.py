@@ -1,91 +1,66 @@
 # src/categorizer.py
 import pandas as pd
+import numpy as np
 import re # For regular expressions, can be more powerful than simple keyword search
+import json
+from functools import lru_cache
+from pathlib import Path
 
-# --- PASTE YOUR CATEGORY_RULES DICTIONARY HERE ---
-CATEGORY_RULES = {
-    "Groceries": ["coop365", "COOP 365","Coop App","superbrugsen", "netto", "rema1000", "føtex", "meny", "lidl", "irma", "bilka togo",
-                  "FAKTA", "FOETEX", "SPAR", "NORMAL", "REMA 1000", "BASALT"
-                  ,"MERCADONA", "ALIMENTACION"],
-    "Salary": ["løn", "salary", "indkomst", "Lønoverførsel", "Allyy"],
-    "Sports": ["fitnessworld", "sats", "gym", "sportmaster", "fitness dk", "FITNESS", "OLYMPIAKOS"
-                ,"MobilePay Juan Marti", "MobilePay Jordi", "MobilePay Oscar Goto"
-                ,"MobilePay Oscar Meji", "MobilePay Venkatesh"],
-    "Education": ["IMF FORMACION", "IMF"],
-    "Rent/Mortgage": ["husleje", "rent", "boligudgift", "mortgage payment", "realkredit"],
-    "Household": ["ikea", "jysk", "imerco", "silvan", "jem & fix", "bauhaus", "isenkram", "ILVA"
-                    ,"MobilePay Niklas Thr", "BOLIGPORTA"],
-    "Transport": ["dsb", "rejsekort", "movia", "gomore", "uber", "bolt", "benzin", "esso", "circle k"
-                  , "shell", "færge", "brobizz", "parkering", "DOT APP"
-                  ,"METRO", "RENFE", "ALSA"],
-    "Flights": ["easyjet", "sas", "norwegian", "ryanair", "Iberia", "IBEXPRESS","Air china", "Qatar air"
-                ,'ETIHAD AIRW', "INDIGOAIR", "BRUSS AIRLI", "VUELING", "AIRLINES"],
-    "Travel": ["LAEGENS VACCINATIONS", "OWNERS CARS", "MONDO", "HEYMONDO", "VND", "INR", "LKR"
-                "Vasileios", "MobilePay Francisco" ,"AIRALO", "HOTEL", "NY CARLSBERG", "BOUTIQUE", "GRUPOGALDANA",
-                "Berlin", "INDIAN RAILWAY", "RAILWAY", "12GO"],
-    "Utilities": ["dong", "hofor", "øresundsenergi", "vand", "varme", "gas", "forsyning", "ANDEL"],
-    "Shopping": ["magasin", "zalando", "hm", "elgiganten", "power", "asos", "boozt", "matas", "bog & ide"
-                 ,"EL CORTE INGLES", "UNIQLO", "GlobalE Jabra", "Telerepair", "CYKLER", "DECATHLON"
-                 ,"ZARA"],
-    "Internet/Phone": ["fastnet", "bredbånd", "telia", "tdc", "hiper", "yousee", "YouSee","oister", "cbb mobil", "telefon"],
-    "Dining Out": ["restaurant", "cafe", "just eat", "wolt", "mcdonalds", "burger king", "pizzeria"
-                    ,"SIDECAR", "PIZZA OTTO", "REFFEN", "JAGGER", "RizRaz", "WOK", "UNION KITCHEN"
-                    ,"MobilePay Chantal", "MobilePay Florin", "MobilePay Ana Caroli", "MobilePay Desiree"
-                    ,"MobilePay Carlos"
-                    ,"MAD OG KAFFE", 'TABERNA', "RTE.", "CASA", "Burgermeister", "RINCON", "CIRKUS APS"
-                    ,"FIVE GUYS", "BURGER", "BODEGAS", "SUSHI", "FOOD", "ISMAGERIET", "THAI KACHA"
-                    ,"7-ELEVEN", "MAGDALENA", "SHAKE", "Brauhaus", "Cafe", "Caffe", "Kaffe"],
-    "Drinks": ["NIGHTPAY", "PROUD MARY CPH", "Sorte Firkant", "IRISH PUB", "ANARKOLI", "BAR", "BLUME"
-                ,"LAVAPI", "STELLA POLARIS", "MIKKELLER", "CERVECERIA", "THE LIVING ROOM"
-                ,"Dimitrios", "Christos", "MobilePay Ninci"],
-    "Subscriptions": ["netflix", "spotify", "hbo", "disney+", "apple music", "storytel", "mofibo"
-                    , "tv2 play", "viaplay", "avis", "blad"],
-    "Healthcare": ["apotek", "læge", "tandlæge", "sygehus", "optiker", "fysioterapeut"],
-    "Transfers": ["overførsel", "transfer", "egen konto", "mobilepay overførsel", "Overført", "Udenl. overf."
-                    ,"MobilePay Beatriz"], 
-    "Cash Withdrawal": ["hævning", "atm", "kontant", "bankautomat"],
-    "Entertainment": ["biograf", "kino", "koncert", "teater", "museum", "tivoli", "zoo", "Instant Gaming"
-                        ,"BILLETLUGEN.DK", "BLS*MYHERITAGE", "GOOGLE", "Nintendo", "MUSEUM"],
-    "Gifts/Charity": ["gave", "donation", "indsamling", "røde kors"],
-    "Financial/Fees": ["gebyr", "renteudgift", "bank fee", "finance charge", "Nordea-min"],
-    "Education": ["kursus", "uddannelse", "skole", "universitet"],
-    "Personal Care": ["frisør", "kosmetolog", "barber", "PELUQUEROS", "PELUQUERIA", "Artemisa"],
-    "Other Income": ["tilbagebetaling", "refund", "renteindtægt"], 
-    "Bank Interest": ["Renter"],
-    "Rent Flat": ["Danielle Benamour", "Domus Apartments DK"],
-    "Deposit Flat": ["Deposit"],
-    "Broker investments": ["xtb.com"],
-    "Revolut transfers": ["REVOLUT"],
-    "Tax payments": ["Skat"],
-    # Add "Uncategorized" as a fallback if needed, or handle it in the function
-}
-# It might be better to load CATEGORY_RULES from a config file (JSON/YAML)
-# For example, from config/categories_keywords.json
-
-def categorize_transaction_row(row_description, rules):
+# Keyword rules live in config/categories_keywords.json as {category: [keywords]}.
+# The file order is the priority order (the first matching category wins).
+RULES_PATH = Path(__file__).resolve().parent.parent / "config" / "categories_keywords.json"
+
+@lru_cache(maxsize=1)
+def load_rules():
+    """ Category rules from RULES_PATH, read once per process. Treat the returned dict as read-only. """
+    return json.loads(RULES_PATH.read_text(encoding='utf-8'))
+
+def compile_category_rules(rules):
+    """
+    Compiles {category: [keywords]} into {category: one regex per category}, preserving rule order.
+    Each regex matches any (lowercased) keyword preceded by a word-boundary, same as matching the
+    keywords one by one. Categories that are already compiled are passed through unchanged.
+    """
+    compiled = {}
+    for category, keywords in rules.items():
+        if isinstance(keywords, re.Pattern):
+            compiled[category] = keywords
+        elif keywords: # An empty alternation would match everything
+            alternation = "|".join(re.escape(keyword.lower()) for keyword in keywords)
+            compiled[category] = re.compile(r"\b(?:" + alternation + ")")
+    return compiled
+
+@lru_cache(maxsize=1)
+def _default_compiled_rules():
+    # The configured rules, lowercased and compiled once on first use (the rules are static)
+    return compile_category_rules(load_rules())
+
+def categorize_transaction_row(row_description, rules=None):
     """
-    Categorizes a single transaction description based on rules.
+    Categorizes a single transaction description based on rules
+    (raw keyword lists or the output of compile_category_rules; defaults to load_rules()).
     Returns the category name or "Uncategorized" if no match.
     """
-    if pd.isna(row_description):
-        return "Uncategorized"
+    # Strings (the common case) skip the pd.isna dispatch; null handling only for other types
+    if not isinstance(row_description, str):
+        if pd.isna(row_description):
+            return "Uncategorized"
+        row_description = str(row_description)
     
-    description_lower = str(row_description).lower()
+    description_lower = row_description.lower()
+    compiled_rules = _default_compiled_rules() if rules is None else compile_category_rules(rules)
 
-    for category, keywords in rules.items():
-        for keyword in keywords:
-            kw_lower = keyword.lower()
-            # Option 1: match if description_lower contains 'kw_lower' preceded by a word‐boundary
-            pattern = r"\b" + re.escape(kw_lower)
-            if re.search(pattern, description_lower):
-                return category
+    # First matching category wins, so dict order matters
+    for category, pattern in compiled_rules.items():
+        if pattern.search(description_lower):
+            return category
 
     return "Uncategorized"
 
-def categorize_transactions_df(df, rules):
+def categorize_transactions_df(df, rules=None):
     """
-    Adds a 'Category' column to the DataFrame by applying categorization rules.
-    df must contain a 'Description' column.
+    Adds a 'Category' column to the DataFrame by applying categorization rules
+    (defaults to load_rules()). df must contain a 'Description' column.
     """
     if 'Description' not in df.columns:
         raise ValueError("DataFrame must contain a 'Description' column for categorization.")
@@ -93,9 +68,39 @@ def categorize_transactions_df(df, rules):
     if 'Category' not in df.columns:
         df['Category'] = "Uncategorized"
 
-    df['Category'] = df['Description'].apply(lambda desc: categorize_transaction_row(desc, rules))
+    compiled_rules = _default_compiled_rules() if rules is None else compile_category_rules(rules) # Compile once, not per row
+    if not compiled_rules:
+        df['Category'] = pd.Categorical(np.full(len(df), "Uncategorized", dtype=object))
+        return df
+
+    # Lowercase once; object dtype keeps the matching on Python's re (Unicode-aware \b, as in
+    # categorize_transaction_row). Bank exports repeat the same merchant text many times, so each
+    # distinct description is categorized once and the result is broadcast back via the codes.
+    desc_lower = df['Description'].fillna('').astype(object).str.lower()
+    codes, unique_descriptions = pd.factorize(desc_lower)
+    df['Category'] = _categorize_descriptions(np.asarray(unique_descriptions, dtype=object), compiled_rules)[codes]
+    # Categorical dtype: isin/==/groupby downstream work on small integer codes instead of hashing strings
+    df['Category'] = df['Category'].astype('category')
     return df
 
+def _categorize_descriptions(descriptions_lower, compiled_rules):
+    """ Category per lowercased description (object ndarray), one scan per category. """
+    categories = np.full(len(descriptions_lower), "Uncategorized", dtype=object)
+    unmatched_idx = np.arange(len(descriptions_lower))
+    # First matching category wins: each category only scans the rows no earlier category claimed
+    for category, pattern in compiled_rules.items():
+        if len(unmatched_idx) == 0:
+            break
+        # Bound pattern.search straight over the (few) distinct strings: no Series/str-accessor setup per category
+        search = pattern.search
+        hits = np.fromiter(
+            (search(desc) is not None for desc in descriptions_lower[unmatched_idx]),
+            dtype=bool, count=len(unmatched_idx)
+        )
+        categories[unmatched_idx[hits]] = category
+        unmatched_idx = unmatched_idx[~hits]
+    return categories
+
 # --- Example Usage (for testing this file directly) ---
 if __name__ == '__main__':
     # Create a sample DataFrame similar to your standardized one
@@ -116,16 +121,14 @@ if __name__ == '__main__':
     print("--- DataFrame Before Categorization ---")
     print(test_df)
 
-    # Make sure CATEGORY_RULES is defined above or loaded from a config
+    # Copy of the configured rules (load_rules() is cached and shared, so don't mutate it)
     # For testing, ensure some keywords match your sample_data
-    if 'My Cool Company Aps'.lower() not in CATEGORY_RULES.get("Salary", []): # Ensure company name in rules
-        if "Salary" in CATEGORY_RULES:
-            CATEGORY_RULES["Salary"].append('My Cool Company Aps'.lower())
-        else:
-            CATEGORY_RULES["Salary"] = ['My Cool Company Aps'.lower()]
+    test_rules = {category: list(keywords) for category, keywords in load_rules().items()}
+    if 'My Cool Company Aps'.lower() not in test_rules.get("Salary", []): # Ensure company name in rules
+        test_rules.setdefault("Salary", []).append('My Cool Company Aps'.lower())
 
 
-    categorized_df = categorize_transactions_df(test_df.copy(), CATEGORY_RULES) # Use .copy() to avoid modifying original
+    categorized_df = categorize_transactions_df(test_df.copy(), test_rules) # Use .copy() to avoid modifying original
 
     print("\n--- DataFrame After Categorization ---")
     print(categorized_df)
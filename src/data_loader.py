@@ -1,48 +1,59 @@
 # src/data_loader.py
 import pandas as pd
+import numpy as np
+import os
+import time
+import uuid
+import hashlib # Content hash of each input file, used as the disk-cache key
+import functools
 from pathlib import Path
-from io import StringIO # To handle uploaded file buffer from Streamlit
-import hashlib # For creating a unique ID for transactions to help with deduplication
-
-# --- [Keep the clean_amount_nordea, clean_amount_danske, 
-# ---  standardize_nordea_df, standardize_danske_df functions as defined previously] ---
-
-def clean_amount_nordea(amount):
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pyarrow  # noqa: F401 -- ships with Streamlit; enables the multithreaded CSV parser
+    CSV_ENGINE = 'pyarrow'
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    CSV_ENGINE = 'c'
+    STRING_DTYPE = 'string'
+
+# Files above this size are parsed + standardized in chunks to bound peak memory
+LARGE_FILE_THRESHOLD_BYTES = 20 * 1024 * 1024
+CSV_CHUNKSIZE = 50_000
+
+# Standardized frames are cached on disk as Parquet in <project root>/.cache/, keyed by bank + a hash
+# of the file contents. NOTE: these files hold your transactions (dates, descriptions, amounts) in plain
+# text; call clear_standardize_cache() or delete the folder to remove them. Set
+# STANDARDIZE_CACHE_MAX_ENTRIES = 0 to turn the cache off.
+# Bump STANDARDIZE_CACHE_VERSION whenever the standardization output changes; entries written by other
+# versions are deleted on the next write.
+STANDARDIZE_CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+STANDARDIZE_CACHE_VERSION = 1
+STANDARDIZE_CACHE_MAX_ENTRIES = 64 # Least recently used entries beyond this are deleted
+
+# --- Amount cleaning + standardize_nordea_df, standardize_nordea2_df, standardize_danske_df ---
+
+def _to_float64(s):
+    # NumPy float64 with NaN for missing values, whether `s` is NumPy- or Arrow-backed
+    return pd.Series(s.to_numpy(dtype='float64', na_value=np.nan), index=s.index, name=s.name)
+
+def _clean_nordea_series(s):
     """
-    If `amount` is already a float/int, return it directly.
-    Otherwise (a string like "-1.697,00"), strip out thousand-dots,
-    replace comma→dot, then float(…).
+    Nordea amount/balance column → float64: numeric columns pass through, text like
+    "-1.697,00" drops the thousand-dots and swaps comma→dot in one str pass, then to_numeric.
+    Unparseable values become NaN.
     """
-    if pd.isna(amount):
-        return None
-
-    # If Pandas already parsed it as a number, just return it
-    if isinstance(amount, (int, float)):
-        return float(amount)
+    if pd.api.types.is_numeric_dtype(s):
+        return _to_float64(s)
+    cleaned = s.astype(str).str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    return _to_float64(pd.to_numeric(cleaned, errors='coerce'))
 
-    # Otherwise do the “`.`→''” and “`,`→'.'” dance
-    s = str(amount).replace('.', '').replace(',', '.')
-    try:
-        return float(s)
-    except ValueError:
-        return None
-
-def clean_amount_danske(amount):
-    """
-    Same idea for Danske files (where Pandas may already parse to float).
-    """
-    if pd.isna(amount):
-        return None
-    if isinstance(amount, (int, float)):
-        return float(amount)
-    try:
-        return float(str(amount))
-    except ValueError:
-        return None
+def _clean_danske_series(s):
+    """ Danske amount/balance column → float64 (Danske amounts already use a decimal point; unparseable → NaN). """
+    return _to_float64(pd.to_numeric(s, errors='coerce'))
 
 
 def standardize_nordea_df(df_in):
-    df = df_in.copy()
     rename_map = {
         'Booking date': 'Raw_Date',
         'Amount': 'Raw_Amount',
@@ -50,23 +61,21 @@ def standardize_nordea_df(df_in):
         'Balance': 'Raw_Balance',
         'Currency': 'Currency'
     }
-    df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns}, inplace=True)
+    # No upfront copy of the raw frame: the renamed frame shares its data with df_in, and below
+    # only whole columns are (re)assigned, so df_in's values are never written to.
+    df = df_in.rename(columns={k: v for k, v in rename_map.items() if k in df_in.columns}, copy=False)
 
     # “Reserved” rows have Raw_Date == "Reserved"
-    df['Status'] = df['Raw_Date'].apply(
-        lambda x: 'Reserved' if str(x).strip().lower() == 'reserved' else 'Booked'
-    )
-    # Only parse actual dates for rows where Status=='Booked'
-    df['Date'] = pd.to_datetime(
-        df.loc[df['Status'] == 'Booked', 'Raw_Date'],
-        format='%Y/%m/%d',
-        errors='coerce'
+    df['Status'] = np.where(
+        df['Raw_Date'].astype(str).str.strip().str.lower().eq('reserved'), 'Reserved', 'Booked'
     )
+    # One parse over the whole column; "Reserved" rows coerce to NaT (Status already flags them)
+    df['Date'] = pd.to_datetime(df['Raw_Date'], format='%Y/%m/%d', errors='coerce')
 
     if 'Raw_Amount' in df.columns:
-        df['Amount'] = df['Raw_Amount'].apply(clean_amount_nordea)
+        df['Amount'] = _clean_nordea_series(df['Raw_Amount'])
     if 'Raw_Balance' in df.columns:
-        df['Balance'] = df['Raw_Balance'].apply(clean_amount_nordea)
+        df['Balance'] = _clean_nordea_series(df['Raw_Balance'])
 
     df['Original_Bank'] = 'Nordea'
     standard_cols = ['Date', 'Description', 'Amount', 'Balance', 'Currency', 'Original_Bank', 'Status']
@@ -82,7 +91,6 @@ def standardize_nordea2_df(df_in):
     Handles files whose headers look like:
       Bogføringsdato;Beløb;Afsender;Modtager;Navn;Beskrivelse;Saldo;Valuta;Afstemt;
     """
-    df = df_in.copy()
     # Map Danish column names → our Raw_ scheme
     rename_map = {
         'Bogføringsdato': 'Raw_Date',
@@ -92,23 +100,20 @@ def standardize_nordea2_df(df_in):
         'Valuta':         'Currency'
         # (We ignore columns like Afsender/Modtager/Navn/Afstemt if present)
     }
-    df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns}, inplace=True)
+    # Rename without copying the raw frame (see standardize_nordea_df)
+    df = df_in.rename(columns={k: v for k, v in rename_map.items() if k in df_in.columns}, copy=False)
 
     # “Reserved” is now “Reserveret” (Danish). Otherwise treat as “Booked”
-    df['Status'] = df['Raw_Date'].apply(
-        lambda x: 'Reserved' if str(x).strip().lower() == 'reserveret' else 'Booked'
-    )
-    # Parse actual dates (Danish format is still YYYY/MM/DD here)
-    df['Date'] = pd.to_datetime(
-        df.loc[df['Status'] == 'Booked', 'Raw_Date'],
-        format='%Y/%m/%d',
-        errors='coerce'
+    df['Status'] = np.where(
+        df['Raw_Date'].astype(str).str.strip().str.lower().eq('reserveret'), 'Reserved', 'Booked'
     )
+    # Parse actual dates (Danish format is still YYYY/MM/DD here); "Reserveret" rows coerce to NaT
+    df['Date'] = pd.to_datetime(df['Raw_Date'], format='%Y/%m/%d', errors='coerce')
 
     if 'Raw_Amount' in df.columns:
-        df['Amount'] = df['Raw_Amount'].apply(clean_amount_nordea)
+        df['Amount'] = _clean_nordea_series(df['Raw_Amount'])
     if 'Raw_Balance' in df.columns:
-        df['Balance'] = df['Raw_Balance'].apply(clean_amount_nordea)
+        df['Balance'] = _clean_nordea_series(df['Raw_Balance'])
 
     df['Original_Bank'] = 'Nordea2'
     standard_cols = ['Date', 'Description', 'Amount', 'Balance', 'Currency', 'Original_Bank', 'Status']
@@ -119,7 +124,6 @@ def standardize_nordea2_df(df_in):
     return df[standard_cols]
 
 def standardize_danske_df(df_in):
-    df = df_in.copy()
     rename_map = {
         'Booking date': 'Raw_Date',
         'Amount': 'Raw_Amount',
@@ -127,19 +131,20 @@ def standardize_danske_df(df_in):
         'Balance': 'Raw_Balance',
         'Currency': 'Currency'
     }
-    df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns}, inplace=True)
+    # Rename without copying the raw frame (see standardize_nordea_df)
+    df = df_in.rename(columns={k: v for k, v in rename_map.items() if k in df_in.columns}, copy=False)
 
     df['Date'] = pd.to_datetime(
         df['Raw_Date'],
         format='%Y-%m-%d',
         errors='coerce'
     )
-    df['Status'] = df['Date'].apply(lambda x: 'Pending/Unknown' if pd.isna(x) else 'Booked')
+    df['Status'] = np.where(df['Date'].isna(), 'Pending/Unknown', 'Booked')
 
     if 'Raw_Amount' in df.columns:
-        df['Amount'] = df['Raw_Amount'].apply(clean_amount_danske)
+        df['Amount'] = _clean_danske_series(df['Raw_Amount'])
     if 'Raw_Balance' in df.columns:
-        df['Balance'] = df['Raw_Balance'].apply(clean_amount_danske)
+        df['Balance'] = _clean_danske_series(df['Raw_Balance'])
 
     df['Original_Bank'] = 'Danske Bank'
     standard_cols = ['Date', 'Description', 'Amount', 'Balance', 'Currency', 'Original_Bank', 'Status']
@@ -149,54 +154,198 @@ def standardize_danske_df(df_in):
 
     return df[standard_cols]
 
+def downcast_standard_df(df):
+    """
+    Shrinks the standardized frame: Amount → float32, Original_Bank → category,
+    Description → Arrow-backed strings (converted once here, reused by dedup/display).
+    Balance stays float64 since running balances can exceed float32's ~7 significant digits.
+    Date ends up as NumPy datetime64[ns] even when the reader inferred an Arrow timestamp column.
+    """
+    if isinstance(df['Date'].dtype, pd.ArrowDtype):
+        df['Date'] = df['Date'].astype('datetime64[ns]')
+    df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce', downcast='float').astype('float32')
+    df['Description'] = df['Description'].astype(STRING_DTYPE)
+    df['Original_Bank'] = df['Original_Bank'].astype('category')
+    return df
+
+def _rewind(src):
+    # Paths are simply reopened by the next read; buffers (uploads/BytesIO) go back to the start
+    if hasattr(src, 'seek'):
+        src.seek(0)
+
+def _input_size(src):
+    """ Size in bytes of a path or an in-memory buffer, without reading or copying its contents. """
+    if isinstance(src, (str, Path)):
+        return Path(src).stat().st_size
+    if hasattr(src, 'getbuffer'):
+        return src.getbuffer().nbytes
+    return len(src.getvalue())
+
+def _read_csv(buf, **kwargs):
+    """
+    pd.read_csv using the PyArrow engine when available (parallel parsing). The result stays
+    Arrow-backed (dtype_backend='pyarrow'): text columns skip the Arrow→object conversion, and the
+    standardizers/downcast_standard_df turn the numeric and date columns into NumPy dtypes.
+    Falls back to the C engine if PyArrow rejects the file (e.g. ragged rows).
+    """
+    if CSV_ENGINE == 'pyarrow':
+        try:
+            return pd.read_csv(buf, engine='pyarrow', dtype_backend='pyarrow', **kwargs)
+        except UnicodeDecodeError:
+            raise # Wrong encoding: the C engine would fail the same way; the caller retries as latin1
+        except Exception as e:
+            print(f"  PyArrow CSV engine failed ({e}); retrying with the C engine.")
+            _rewind(buf)
+    return pd.read_csv(buf, **kwargs)
+
+def _read_standardized(buf, standardize_fn, **kwargs):
+    """
+    Reads `buf` (a path or a binary buffer) and runs `standardize_fn` + downcast on it. Large inputs
+    are streamed in CSV_CHUNKSIZE-row chunks (C engine; PyArrow has no chunksize) so only one raw chunk
+    is alive at a time instead of the whole raw frame next to its standardized copy.
+    """
+    if _input_size(buf) > LARGE_FILE_THRESHOLD_BYTES:
+        chunks = pd.read_csv(buf, chunksize=CSV_CHUNKSIZE, **kwargs)
+        return pd.concat(
+            (downcast_standard_df(standardize_fn(chunk)) for chunk in chunks),
+            ignore_index=True
+        )
+    return downcast_standard_df(standardize_fn(_read_csv(buf, **kwargs)))
+
+def _read_bank_csv(src, bank_name, encoding):
+    # Routes to the bank's CSV dialect + standardizer; `src` is a path or a binary buffer
+    lower_name = bank_name.lower()
+    if lower_name == 'nordea':
+        try:
+            return _read_standardized(src, standardize_nordea_df, sep=';', decimal=',', encoding=encoding)
+        except UnicodeDecodeError:
+            raise
+        except ValueError:
+            _rewind(src)
+            return _read_standardized(src, standardize_nordea_df, sep=';', encoding=encoding)
+
+    elif lower_name == 'nordea2':
+        try:
+            return _read_standardized(src, standardize_nordea2_df, sep=';', decimal=',', encoding=encoding)
+        except UnicodeDecodeError:
+            raise
+        except ValueError:
+            _rewind(src)
+            return _read_standardized(src, standardize_nordea2_df, sep=';', encoding=encoding)
+
+    elif lower_name == 'danske':
+        return _read_standardized(src, standardize_danske_df, sep=',', encoding=encoding)
+
+    else:
+        raise ValueError(f"Unsupported bank_name: {bank_name}. "
+                         f"Use 'nordea', 'nordea2', or 'danske'.")
+
+def _content_digest(src):
+    """ BLAKE2b digest (hex) of a path's or buffer's bytes; paths are hashed in blocks, not slurped. """
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(src, (str, Path)):
+        with open(src, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(block)
+    elif hasattr(src, 'getbuffer'):
+        with src.getbuffer() as view:
+            h.update(view)
+    else:
+        h.update(src.getvalue())
+    return h.hexdigest()
+
+def _standardize_cache_path(bank_name, digest):
+    return STANDARDIZE_CACHE_DIR / f"{bank_name.lower()}_v{STANDARDIZE_CACHE_VERSION}_{digest}.parquet"
+
+def _prune_standardize_cache():
+    """
+    Keeps STANDARDIZE_CACHE_DIR bounded: drops entries from other cache versions, temp files
+    orphaned by interrupted writes (older than an hour), and the least recently used entries
+    beyond STANDARDIZE_CACHE_MAX_ENTRIES (hits refresh an entry's mtime).
+    """
+    now = time.time()
+    current = []
+    for path in STANDARDIZE_CACHE_DIR.iterdir():
+        try:
+            if path.suffix == '.tmp':
+                if now - path.stat().st_mtime > 3600:
+                    path.unlink()
+            elif path.suffix == '.parquet':
+                if f"_v{STANDARDIZE_CACHE_VERSION}_" in path.name:
+                    current.append((path.stat().st_mtime, path))
+                else:
+                    path.unlink()
+        except FileNotFoundError: # Removed by a parallel load meanwhile
+            pass
+    current.sort(reverse=True)
+    for _, path in current[STANDARDIZE_CACHE_MAX_ENTRIES:]:
+        path.unlink(missing_ok=True)
+
+def clear_standardize_cache():
+    """ Deletes every cached standardized file (and STANDARDIZE_CACHE_DIR's temp files). """
+    if STANDARDIZE_CACHE_DIR.exists():
+        for path in STANDARDIZE_CACHE_DIR.iterdir():
+            if path.suffix in ('.parquet', '.tmp'):
+                path.unlink(missing_ok=True)
+
+def _parquet_disk_cache(load_fn):
+    """
+    Memoizes load_fn(file_path_or_buffer, bank_name) in STANDARDIZE_CACHE_DIR: unchanged files
+    are read back from Parquet instead of being parsed + standardized again. Empty (failed) results
+    are not cached, the folder is pruned after every write, and any cache error just falls back to load_fn.
+    """
+    @functools.wraps(load_fn)
+    def wrapper(file_path_or_buffer, bank_name):
+        if CSV_ENGINE != 'pyarrow' or STANDARDIZE_CACHE_MAX_ENTRIES <= 0: # Parquet needs pyarrow
+            return load_fn(file_path_or_buffer, bank_name)
+        try:
+            cache_path = _standardize_cache_path(bank_name, _content_digest(file_path_or_buffer))
+            if cache_path.exists():
+                df = pd.read_parquet(cache_path)
+                os.utime(cache_path) # Mark as recently used for the pruning order
+                return df
+        except Exception as e:
+            print(f"  Standardize cache unavailable ({e}); loading without it.")
+            return load_fn(file_path_or_buffer, bank_name)
+
+        df = load_fn(file_path_or_buffer, bank_name)
+        if not df.empty:
+            try:
+                STANDARDIZE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                # Write to a unique temp name, then rename: parallel loads never see a partial file
+                tmp_path = cache_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+                df.to_parquet(tmp_path, compression='zstd', index=False)
+                os.replace(tmp_path, cache_path)
+                _prune_standardize_cache()
+            except Exception as e:
+                print(f"  Could not write standardize cache {cache_path.name}: {e}")
+        return df
+    return wrapper
+
 # --- [This is the function you were primarily focused on for loading one file] ---
+@_parquet_disk_cache
 def load_and_standardize_one_transaction_file(file_path_or_buffer, bank_name):
     """
     Loads a single CSV (or buffer), routes to 
     standardize_nordea_df, standardize_nordea2_df, or standardize_danske_df
     depending on bank_name.
+    Paths and upload buffers go straight to pd.read_csv (no decoded copy of the whole file);
+    the text is read as UTF-8 (BOM-tolerant) and re-read as latin1 only if that fails to decode.
     """
-    df_raw = None
     try:
         if isinstance(file_path_or_buffer, (str, Path)):
-            with open(file_path_or_buffer, 'r', encoding='utf-8-sig') as f:
-                raw_text = f.read()
-            buf = StringIO(raw_text)
+            src = file_path_or_buffer
         elif hasattr(file_path_or_buffer, 'getvalue'):
-            try:
-                buf = StringIO(file_path_or_buffer.getvalue().decode('utf-8-sig'))
-            except UnicodeDecodeError:
-                file_path_or_buffer.seek(0)
-                buf = StringIO(file_path_or_buffer.getvalue().decode('latin1'))
-            file_path_or_buffer.seek(0)
+            src = file_path_or_buffer
+            src.seek(0)
         else:
             raise ValueError("Unsupported file input type.")
 
-        lower_name = bank_name.lower()
-        if lower_name == 'nordea':
-            try:
-                df_raw = pd.read_csv(buf, sep=';', decimal=',')
-            except ValueError:
-                buf.seek(0)
-                df_raw = pd.read_csv(buf, sep=';')
-            return standardize_nordea_df(df_raw)
-
-        elif lower_name == 'nordea2':
-            try:
-                df_raw = pd.read_csv(buf, sep=';', decimal=',')
-            except ValueError:
-                buf.seek(0)
-                df_raw = pd.read_csv(buf, sep=';')
-            return standardize_nordea2_df(df_raw)
-
-        elif lower_name == 'danske':
-            buf.seek(0)
-            df_raw = pd.read_csv(buf, sep=',')
-            return standardize_danske_df(df_raw)
-
-        else:
-            raise ValueError(f"Unsupported bank_name: {bank_name}. "
-                             f"Use 'nordea', 'nordea2', or 'danske'.")
+        try:
+            return _read_bank_csv(src, bank_name, encoding='utf-8-sig')
+        except UnicodeDecodeError:
+            _rewind(src)
+            return _read_bank_csv(src, bank_name, encoding='latin1')
 
     except Exception as e:
         print(f"Error in load_and_standardize_one_transaction_file({bank_name}): {e}")
@@ -208,39 +357,48 @@ def process_bank_data_folders(main_bank_data_path: Path):
     Processes all CSV files from Nordea and Danske subfolders within the main_bank_data_path.
     Concatenates them and handles duplicates.
     """
-    all_standardized_dfs = []
-    
     nordea_path = main_bank_data_path / "nordea"
     danske_path = main_bank_data_path / "danske"
+    files_to_load = [] # (file, bank_name) pairs, Nordea first, each folder sorted
 
-    # Process Nordea files
+    # Collect Nordea files
     if nordea_path.exists() and nordea_path.is_dir():
         print(f"Processing Nordea files from: {nordea_path}")
         for file in sorted(nordea_path.glob("*.csv")):
             print(f"  Loading Nordea file: {file.name}")
-            df = load_and_standardize_one_transaction_file(file, bank_name='nordea')
-            if not df.empty:
-                all_standardized_dfs.append(df)
+            files_to_load.append((file, 'nordea'))
     else:
         print(f"Nordea path not found or not a directory: {nordea_path}")
 
-    # Process Danske Bank files
+    # Collect Danske Bank files
     if danske_path.exists() and danske_path.is_dir():
         print(f"Processing Danske Bank files from: {danske_path}")
         for file in sorted(danske_path.glob("*.csv")):
             print(f"  Loading Danske Bank file: {file.name}")
-            df = load_and_standardize_one_transaction_file(file, bank_name='danske')
-            if not df.empty:
-                all_standardized_dfs.append(df)
+            files_to_load.append((file, 'danske'))
     else:
         print(f"Danske Bank path not found or not a directory: {danske_path}")
 
+    # Load the files in parallel: CSV parsing (PyArrow/C engine) releases the GIL.
+    # map() keeps the input order, so the concat (and keep='first' dedup) is unchanged.
+    all_standardized_dfs = []
+    if files_to_load:
+        max_workers = min(32, os.cpu_count() or 1, len(files_to_load))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            loaded = executor.map(
+                lambda pair: load_and_standardize_one_transaction_file(pair[0], bank_name=pair[1]),
+                files_to_load
+            )
+            all_standardized_dfs = [df for df in loaded if not df.empty]
+
     if not all_standardized_dfs:
         print("No transaction data found or processed.")
         return pd.DataFrame()
 
     # Concatenate all DataFrames
     combined_df = pd.concat(all_standardized_dfs, ignore_index=True)
+    # concat of categoricals with different categories falls back to object, so re-cast
+    combined_df['Original_Bank'] = combined_df['Original_Bank'].astype('category')
     print(f"Total rows before deduplication: {len(combined_df)}")
 
     # --- Handle Duplicates ---
@@ -249,51 +407,23 @@ def process_bank_data_folders(main_bank_data_path: Path):
     # 'Balance' can change even for duplicate transactions if other transactions happened in between,
     # so it's not always a reliable field for deduplication.
     # 'Description' and 'Amount' along with 'Date' are often good.
-    
-    # Ensure 'Date' is datetime for proper duplicate checking
-    combined_df['Date'] = pd.to_datetime(combined_df['Date'], errors='coerce')
+    # 'Date' is already datetime64 here: every standardize_*_df parses it, and concat keeps the dtype.
 
-    # Create a unique ID for more robust deduplication, especially if timestamps are missing
-    # We hash key fields to create this ID. Consider nulls carefully.
-    # Fill NaNs in key columns for hashing to ensure consistency
+    # Deduplicate directly on the key columns: drop_duplicates hashes the subset itself,
+    # so no intermediate Transaction_ID column is built. If a per-row ID is ever needed,
+    # pd.util.hash_pandas_object(combined_df[cols_for_id], index=False) gives one as uint64.
     cols_for_id = ['Date', 'Description', 'Amount', 'Original_Bank']
-    
-    def create_transaction_id(row):
-        # Ensure date is string in a consistent format, handle NaT
-        date_str = row['Date'].strftime('%Y-%m-%d %H:%M:%S') if pd.notna(row['Date']) else "NoDate"
-        # Handle NaN in other fields
-        desc_str = str(row['Description']) if pd.notna(row['Description']) else "NoDesc"
-        amount_str = f"{row['Amount']:.2f}" if pd.notna(row['Amount']) else "NoAmount"
-        bank_str = str(row['Original_Bank']) if pd.notna(row['Original_Bank']) else "NoBank"
-        
-        # Concatenate and hash
-        # Adding a small random element or a sequence number from the original file
-        # might be needed if multiple identical transactions on the same day are possible and legitimate.
-        # For now, this should catch most statement overlaps.
-        id_string = f"{date_str}-{desc_str}-{amount_str}-{bank_str}"
-        return hashlib.md5(id_string.encode('utf-8')).hexdigest()
-
-    if not combined_df.empty and all(col in combined_df.columns for col in ['Date', 'Description', 'Amount', 'Original_Bank']):
-        combined_df['Transaction_ID'] = combined_df.apply(create_transaction_id, axis=1)
-        
+
+    if not combined_df.empty and all(col in combined_df.columns for col in cols_for_id):
         # When dropping duplicates, consider which one to keep ('first' or 'last').
         # 'first' is usually fine if the data is generally chronological within files.
-        # We sort by Date (and potentially an original file import order if available) before dropping.
-        # Here, we rely on the Transaction_ID which should be stable.
         # 'Status' might also be relevant: a 'Booked' transaction is more definitive than 'Reserved'.
         # If you have both a 'Reserved' and 'Booked' for the same logical transaction, you'd want to keep 'Booked'.
         # This complex logic might require grouping by a more abstract transaction identifier first.
-        
-        # For now, a simpler deduplication based on Transaction_ID:
-        print(f"  Number of unique Transaction_IDs: {combined_df['Transaction_ID'].nunique()}")
-        combined_df.drop_duplicates(subset=['Transaction_ID'], keep='first', inplace=True)
-        print(f"Total rows after Transaction_ID deduplication: {len(combined_df)}")
-
-    # Alternative/Simpler deduplication if Transaction_ID is too complex or not working as expected:
-    # subset_cols = ['Date', 'Description', 'Amount', 'Original_Bank'] # Add more if needed
-    # if all(col in combined_df.columns for col in subset_cols):
-    #     combined_df.drop_duplicates(subset=subset_cols, keep='first', inplace=True)
-    #     print(f"Total rows after subset columns deduplication: {len(combined_df)}")
+        # Adding a sequence number from the original file might be needed if multiple identical
+        # transactions on the same day are possible and legitimate; this catches statement overlaps.
+        combined_df.drop_duplicates(subset=cols_for_id, keep='first', inplace=True)
+        print(f"Total rows after key-column deduplication: {len(combined_df)}")
 
 
     # Final cleaning and sorting
@@ -302,9 +432,12 @@ def process_bank_data_folders(main_bank_data_path: Path):
         key_fields_for_empty_check = ['Date', 'Description', 'Amount']
         combined_df.dropna(subset=key_fields_for_empty_check, how='all', inplace=True)
 
-        # Sort by date descending, NaT (e.g. 'Reserved' or 'Pending') at the top or bottom
-        combined_df.sort_values(by=['Date', 'Amount'], ascending=[False, True], na_position='first', inplace=True)
-        combined_df.reset_index(drop=True, inplace=True)
+        # Sort by date descending, NaT (e.g. 'Reserved' or 'Pending') at the top or bottom.
+        # ignore_index renumbers in the same pass (no separate reset_index)
+        combined_df.sort_values(
+            by=['Date', 'Amount'], ascending=[False, True], na_position='first',
+            ignore_index=True, inplace=True
+        )
 
     return combined_df
 
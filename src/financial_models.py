@@ -50,35 +50,47 @@ def project_investment_value_over_time(principal: float,
                                        contribution_timing: str = 'end') -> pd.DataFrame:
     """
     Projects investment value year by year.
-    Returns a DataFrame with columns ['Year', 'Start_Balance', 'Contribution', 'Growth', 'End_Balance'].
+    Returns a DataFrame with columns ['Year', 'Start_Balance', 'Contribution', 'Growth_Amount', 'End_Balance'],
+    built from the closed-form balances of project_balance_path (no per-year loop).
     """
-    yearly_data = []
-    current_balance = principal
+    # Contributions only apply for a recognised timing (as in the year-by-year version)
+    contribution = annual_contribution if contribution_timing in ('start', 'end') else 0
+    end_balances = project_balance_path(principal, annual_rate, years_horizon, contribution, contribution_timing)
+    start_balances = np.concatenate(([principal], end_balances))[:-1]
+    # Growth is earned on the start balance, plus the contribution when it lands at the start of the year
+    growth = (start_balances + (contribution if contribution_timing == 'start' else 0)) * annual_rate
 
-    for year in range(1, years_horizon + 1):
-        start_balance_year = current_balance
-        contribution_this_year = 0
-        
+    return pd.DataFrame({
+        'Year': np.arange(1, years_horizon + 1),
+        'Start_Balance': start_balances,
+        'Contribution': contribution,
+        'Growth_Amount': growth,
+        'End_Balance': end_balances
+    })
+
+
+def project_balance_path(principal: float,
+                         annual_rate: float,
+                         years_horizon: int,
+                         annual_contribution: float = 0,
+                         contribution_timing: str = 'end') -> np.ndarray:
+    """
+    End-of-year balances for years 1..years_horizon as an array (closed-form annuity,
+    no per-year loop). project_investment_value_over_time builds its table on top of this.
+    """
+    years = np.arange(1, years_horizon + 1, dtype=np.float64)
+    growth = (1 + annual_rate)**years
+    if annual_rate == 0:
+        contributions = annual_contribution * years
+    else:
+        contributions = annual_contribution * (growth - 1) / annual_rate
         if contribution_timing == 'start':
-            current_balance += annual_contribution
-            contribution_this_year = annual_contribution
-        
-        growth_this_year = current_balance * annual_rate
-        current_balance += growth_this_year
-        
-        if contribution_timing == 'end':
-            current_balance += annual_contribution
-            contribution_this_year = annual_contribution
-            
-        yearly_data.append({
-            'Year': year,
-            'Start_Balance': start_balance_year,
-            'Contribution': contribution_this_year,
-            'Growth_Amount': growth_this_year,
-            'End_Balance': current_balance
-        })
-        
-    return pd.DataFrame(yearly_data)
+            contributions *= (1 + annual_rate) # Annuity due: each contribution grows one extra year
+    return principal * growth + contributions
+
+def project_value_path(initial_value: float, annual_growth_rate: float, years_horizon: int) -> np.ndarray:
+    """ Values for years 1..years_horizon as an array (the 'Value' column of project_asset_value_over_time). """
+    return initial_value * (1 + annual_growth_rate)**np.arange(1, years_horizon + 1, dtype=np.float64)
 
 
 # --- Loan / Mortgage Calculations ---
@@ -107,40 +119,62 @@ def generate_amortization_schedule(principal: float,
                                    start_date: pd.Timestamp = None) -> pd.DataFrame:
     """
     Generates an amortization schedule for a loan.
-    Returns a DataFrame with details for each payment period.
+    Returns a DataFrame with details for each payment period. The remaining balance comes from
+    the closed form B_k = P*(1+r)^k - payment*((1+r)^k - 1)/r for all periods at once (no per-payment loop).
     """
     payment = calculate_loan_payment(principal, annual_interest_rate, loan_term_years, payments_per_year)
     rate_per_period = annual_interest_rate / payments_per_year
-    num_payments = loan_term_years * payments_per_year
-    
-    schedule = []
-    remaining_balance = principal
-    
+    num_payments = int(loan_term_years * payments_per_year) # Ensure num_payments is int
+
     if start_date is None:
         start_date = pd.Timestamp.now() # Default to today if no start date
 
-    current_date = start_date
+    periods = np.arange(1, num_payments + 1)
+    if rate_per_period == 0:
+        remaining_balance = principal - payment * periods.astype(np.float64)
+    else:
+        growth = (1 + rate_per_period)**periods.astype(np.float64)
+        remaining_balance = principal * growth - payment * (growth - 1) / rate_per_period
+    # Ensure remaining_balance doesn't go slightly negative due to float precision
+    remaining_balance[np.abs(remaining_balance) < 0.01] = 0.0
 
-    for i in range(1, int(num_payments) + 1): # Ensure num_payments is int
-        interest_paid = remaining_balance * rate_per_period
-        principal_paid = payment - interest_paid
-        remaining_balance -= principal_paid
-        
-        # Ensure remaining_balance doesn't go slightly negative due to float precision
-        if remaining_balance < 0.01 and remaining_balance > -0.01 : remaining_balance = 0 
-
-        schedule.append({
-            'Payment_Period': i,
-            'Payment_Date': current_date,
-            'Payment': payment,
-            'Principal_Paid': principal_paid,
-            'Interest_Paid': interest_paid,
-            'Remaining_Balance': remaining_balance
-        })
-        # Increment date by roughly a month (can be improved for exact month ends)
-        current_date = current_date + pd.DateOffset(months=1) 
-        
-    return pd.DataFrame(schedule)
+    # Interest accrues on the balance left after the previous payment (the principal for period 1)
+    interest_paid = np.concatenate(([principal], remaining_balance[:-1])) * rate_per_period
+
+    return pd.DataFrame({
+        'Payment_Period': periods,
+        # Roughly a month per payment, as before: the offset is applied cumulatively from start_date
+        'Payment_Date': pd.date_range(start=start_date, periods=num_payments, freq=pd.DateOffset(months=1)),
+        'Payment': payment,
+        'Principal_Paid': payment - interest_paid,
+        'Interest_Paid': interest_paid,
+        'Remaining_Balance': remaining_balance
+    })
+
+
+def loan_year_end_balances(principal: float,
+                           annual_interest_rate: float,
+                           loan_term_years: int,
+                           years_horizon: int,
+                           payments_per_year: int = 12) -> np.ndarray:
+    """
+    Remaining loan balance at the end of years 1..years_horizon (0 once paid off), from the
+    closed-form balance B_k = P*(1+r)^k - payment*((1+r)^k - 1)/r instead of a full schedule.
+    """
+    payment = calculate_loan_payment(principal, annual_interest_rate, loan_term_years, payments_per_year)
+    rate_per_period = annual_interest_rate / payments_per_year
+    num_payments = int(loan_term_years * payments_per_year)
+
+    payments_made = np.minimum(np.arange(1, years_horizon + 1) * payments_per_year, num_payments).astype(np.float64)
+    if rate_per_period == 0:
+        balances = principal - payment * payments_made
+    else:
+        growth = (1 + rate_per_period)**payments_made
+        balances = principal * growth - payment * (growth - 1) / rate_per_period
+
+    # Fully paid, or only float noise left
+    balances[(payments_made >= num_payments) | (np.abs(balances) < 0.01)] = 0.0
+    return balances
 
 
 # --- Asset & Value Projections ---
@@ -151,13 +185,11 @@ def project_asset_value(initial_value: float, annual_growth_rate: float, years:
 def project_asset_value_over_time(initial_value: float, 
                                   annual_growth_rate: float, 
                                   years_horizon: int) -> pd.DataFrame:
-    """Projects asset value year by year."""
-    yearly_data = []
-    current_value = initial_value
-    for year in range(1, years_horizon + 1):
-        current_value = current_value * (1 + annual_growth_rate)
-        yearly_data.append({'Year': year, 'Value': current_value})
-    return pd.DataFrame(yearly_data)
+    """Projects asset value year by year (closed form via project_value_path)."""
+    return pd.DataFrame({
+        'Year': np.arange(1, years_horizon + 1),
+        'Value': project_value_path(initial_value, annual_growth_rate, years_horizon)
+    })
 
 
 # --- Inflation ---
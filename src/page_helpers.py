@@ -0,0 +1,152 @@
+# src/page_helpers.py
+# Shared helpers for the Streamlit pages (loading, dedup + categorization, filtering),
+# kept here so the page scripts stay small and the cached functions live in an imported module.
+import io
+import uuid
+import streamlit as st
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+
+from src.data_loader import process_bank_data_folders, load_and_standardize_one_transaction_file, STRING_DTYPE
+from src.categorizer import categorize_transactions_df, compile_category_rules, load_rules
+from src.utils import ensure_expense_schema
+from src.analysis_functions import calculate_historical_average_annual_living_expenses
+
+# --- Cached loaders: unchanged inputs are served from Streamlit's cache instead of re-parsing ---
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_process_folders(path_str, listing_key: tuple):
+    # `listing_key` is only part of the cache key: any added, edited or removed CSV changes it
+    return process_bank_data_folders(Path(path_str))
+
+def _folder_listing_key(folder: Path) -> tuple:
+    """ (relative path, mtime_ns, size) of every CSV under `folder`: a stat per file, no reads. """
+    key = []
+    for csv_path in sorted(folder.rglob('*.csv')):
+        stat = csv_path.stat()
+        key.append((str(csv_path.relative_to(folder)), stat.st_mtime_ns, stat.st_size))
+    return tuple(key)
+
+def cached_process_folders(path_str):
+    """ process_bank_data_folders, cached until the folder's CSV files change. """
+    return _cached_process_folders(path_str, _folder_listing_key(Path(path_str)))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_load_one(file_bytes: bytes, bank_name: str):
+    return load_and_standardize_one_transaction_file(io.BytesIO(file_bytes), bank_name=bank_name)
+
+@st.cache_resource
+def get_compiled_rules():
+    """ The configured category rules compiled to one regex per category, shared across reruns and sessions. """
+    return compile_category_rules(load_rules())
+
+@st.cache_data(show_spinner="Categorizing…", max_entries=8)
+def _cached_categorize(df: pd.DataFrame, rules_key: tuple, _rules):
+    # `_rules` is not hashed (leading underscore); `rules_key` identifies it for the cache.
+    return categorize_transactions_df(df.copy(), _rules)
+
+def _rules_cache_key(rules):
+    # Keeps the dict order: the first matching category wins, so order is part of the rules
+    return tuple(
+        (category, keywords.pattern if hasattr(keywords, 'pattern') else tuple(keywords))
+        for category, keywords in rules.items()
+    )
+
+# --- Dedupe + categorize ---
+def process_and_categorize_data(df_in, rules):
+    """ Deduplicate on (Date, Description, Amount, Original_Bank) and then categorize. """
+    if df_in.empty:
+        return pd.DataFrame()
+
+    # Typed Date/Amount (no-ops when the loader already did it), and undated rows (e.g. 'Reserved')
+    # dropped once here so the pages and analysis functions can assume a clean schema on every rerun.
+    df = ensure_expense_schema(df_in)
+
+    # Deduplicate directly on the key columns (only the first 50 chars of Description count)
+    if all(col in df.columns for col in ['Date', 'Description', 'Amount', 'Original_Bank']):
+        # No-op cast when the loader already produced Arrow-backed strings
+        df['_desc50'] = df['Description'].astype(STRING_DTYPE).str.slice(0, 50)
+        df = df.drop_duplicates(
+            subset=['Date', '_desc50', 'Amount', 'Original_Bank'], keep='first'
+        ).drop(columns=['_desc50'])
+
+    # Now categorize using your rules (cached on the deduplicated data + rules); Category comes back categorical
+    return _cached_categorize(df, _rules_cache_key(rules), rules)
+
+# --- Session storage of the categorized transactions ---
+def store_categorized_df(df):
+    """
+    Keeps the canonical categorized frame in session_state as a pyarrow Table
+    (columnar, categoricals stay dictionary-encoded) instead of a pandas frame.
+    """
+    if df.empty:
+        st.session_state.categorized_transactions_df = pd.DataFrame()
+    else:
+        st.session_state.categorized_transactions_df = pa.Table.from_pandas(df, preserve_index=False)
+    # New token on every store (unique across sessions), used as a cheap cache key for this data
+    st.session_state.categorized_df_token = uuid.uuid4().hex
+    # The pandas view of the previous data is stale now; get_categorized_df rebuilds it on demand
+    st.session_state.pop('categorized_df_pandas', None)
+
+def get_categorized_df():
+    """
+    Categorized transactions from session_state as a pandas DataFrame (empty if none loaded).
+    The Table is converted once per stored dataset and the same frame is returned on every
+    rerun, so treat it as read-only (filter/copy instead of assigning into it).
+    """
+    stored = st.session_state.get('categorized_transactions_df')
+    if stored is None:
+        return pd.DataFrame()
+    if isinstance(stored, pa.Table):
+        token = categorized_df_token()
+        converted = st.session_state.get('categorized_df_pandas')
+        if converted is None or converted[0] != token:
+            # Plain to_pandas (no ArrowDtype mapper) so dictionary columns come back as Categorical
+            converted = (token, stored.to_pandas())
+            st.session_state.categorized_df_pandas = converted
+        return converted[1]
+    return stored
+
+def sorted_categories(df):
+    """ Sorted category names present in df['Category'] (a pandas Index for categoricals, else a list). """
+    categories = df['Category']
+    if isinstance(categories.dtype, pd.CategoricalDtype):
+        # Categorical: the categories Index is already sorted (astype('category') sorts it), so it is
+        # returned as-is; no row scan, no list/sort. Streamlit widgets take the Index as options.
+        return categories.cat.categories
+    return sorted(categories.dropna().unique().tolist())
+
+def categorized_df_token():
+    """ Identifies the currently stored categorized data (None if nothing was stored yet). """
+    return st.session_state.get('categorized_df_token')
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_hist_avg(data_token, exclude_categories: tuple, _df):
+    # `_df` is not hashed; data_token identifies it. The wrapped function is uncached, so a miss
+    # here computes once without hashing the frame into a second cache.
+    return calculate_historical_average_annual_living_expenses(_df, exclude_categories)
+
+def cached_historical_average_living_expenses(df, exclude_categories) -> float:
+    """
+    Historical average annual living expenses for the stored categorized transactions
+    (df as returned by get_categorized_df), cached on the data token + exclusions
+    so the frame isn't re-hashed on every rerun.
+    """
+    return _cached_hist_avg(categorized_df_token(), tuple(sorted(exclude_categories)), df)
+
+# --- Filtering ---
+def build_date_category_mask(df, start_date, end_date, chosen_cats):
+    """ Boolean mask for rows within [start_date, end_date] (inclusive) and in chosen_cats. """
+    # Compare against Timestamps (stays in datetime64) rather than building .dt.date objects
+    start_ts = pd.Timestamp(start_date)
+    end_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    return (
+        (df['Date'] >= start_ts) &
+        (df['Date'] < end_ts) &
+        (df['Category'].isin(chosen_cats))
+    )
+
+def split_expenses(df):
+    """ Rows with a negative Amount, computed once and shared by all expense plots (no copy). """
+    expenses_mask = df['Amount'].to_numpy() < 0
+    return df.iloc[expenses_mask]
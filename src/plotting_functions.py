@@ -1,19 +1,54 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from src.utils import ensure_datetime, ensure_numeric
 # Import plotly.express as px if you decide to use it later
 
+# --- Shared monthly aggregations (computed once per rerun, reused by several plots) ---
+def build_monthly_summary(df):
+    """
+    Month-end totals indexed by Date: Income, Expenses (positive) and Net.
+    Shared by the income/expense, net savings and savings rate plots.
+    """
+    dates = ensure_datetime(df['Date'])
+    valid = dates.notna()
+    amount = ensure_numeric(df['Amount']).fillna(0)[valid]
+
+    monthly_summary = pd.DataFrame(
+        {'Income': amount.clip(lower=0), 'Expenses': (-amount).clip(lower=0)}
+    ).set_axis(pd.DatetimeIndex(dates[valid], name='Date')).resample('ME').sum() # Use ME for Month End
+    monthly_summary['Net'] = monthly_summary['Income'] - monthly_summary['Expenses']
+    return monthly_summary
+
+def build_monthly_category_spend(df_expenses):
+    """
+    Month x Category table of absolute expense totals (month-start DatetimeIndex rows, one column per category).
+    Shared by the monthly-by-category and % change plots.
+    """
+    dates = ensure_datetime(df_expenses['Date'])
+    valid = dates.notna()
+    absolute_amount = ensure_numeric(df_expenses['Amount']).abs().fillna(0)[valid]
+    # Truncate to month start with datetime64 arithmetic (no Period object per row); the index is
+    # then already datetime, which is what st.line_chart wants
+    month = pd.DatetimeIndex(dates[valid].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]'), name='Month')
+
+    return (
+        absolute_amount.groupby([month, df_expenses['Category'][valid]], observed=True)
+        .sum()
+        .unstack(fill_value=0)
+    )
+
 def plot_spending_by_category(df_expenses, currency_suffix):
     """Plots spending by category using st.bar_chart."""
     if df_expenses.empty:
         st.write("No expense data for category plot.")
         return
 
-    # Ensure 'Absolute_Amount' is numeric and NaNs are handled
-    df_expenses['Absolute_Amount'] = pd.to_numeric(df_expenses['Amount'], errors='coerce').abs().fillna(0)
+    # Ensure 'Absolute_Amount' is numeric and NaNs are handled (without mutating the caller's frame)
+    absolute_amount = ensure_numeric(df_expenses['Amount']).abs().fillna(0)
     
     cat_spend = (
-        df_expenses.groupby('Category')['Absolute_Amount']
+        absolute_amount.groupby(df_expenses['Category'], observed=True)
         .sum()
         .sort_values(ascending=False)
         .fillna(0)
@@ -27,64 +62,31 @@ def plot_spending_by_category(df_expenses, currency_suffix):
         st.write("No expense data after grouping by category.")
 
 
-def plot_income_expense_trend(df_for_trend, currency_suffix):
+def plot_income_expense_trend(df_for_trend, currency_suffix, monthly_summary=None):
     """Plots monthly income vs. expense trend using st.bar_chart."""
-    if df_for_trend.empty:
-        st.write("No data for income/expense trend.")
-        return
-
-    df_month = df_for_trend.copy()
-    df_month['Date'] = pd.to_datetime(df_month['Date'], errors='coerce') # Ensure datetime
-    df_month = df_month.dropna(subset=['Date']) # Drop rows if Date became NaT
-    if df_month.empty:
-        st.write("No valid date data for income/expense trend.")
-        return
-        
-    df_month.set_index('Date', inplace=True)
-    df_month['Amount'] = pd.to_numeric(df_month['Amount'], errors='coerce').fillna(0)
-
-    monthly_summary = (
-        df_month.resample('ME')['Amount'] # Use ME for Month End
-        .agg(
-            Income=lambda x: x[x > 0].sum(),
-            Expenses=lambda x: x[x < 0].sum()
-        )
-        .reset_index()
-    )
-    monthly_summary['Income'] = monthly_summary['Income'].fillna(0)
-    monthly_summary['Expenses'] = monthly_summary['Expenses'].fillna(0).abs()
+    if monthly_summary is None:
+        if df_for_trend.empty:
+            st.write("No data for income/expense trend.")
+            return
+        monthly_summary = build_monthly_summary(df_for_trend)
 
     if not monthly_summary.empty:
         st.subheader(f"Income vs. Expenses Over Time (Monthly, {currency_suffix})")
-        monthly_idx = monthly_summary.set_index('Date')[['Income', 'Expenses']]
-        st.bar_chart(monthly_idx)
+        st.bar_chart(monthly_summary[['Income', 'Expenses']])
     else:
         st.write("Not enough data to form a monthly income/expense trend.")
 
-def plot_net_savings_trend(df_for_trend, currency_suffix):
+def plot_net_savings_trend(df_for_trend, currency_suffix, monthly_summary=None):
     """Plots monthly net savings trend using st.bar_chart."""
-    if df_for_trend.empty:
-        st.write("No data for net savings trend.")
-        return
+    if monthly_summary is None:
+        if df_for_trend.empty:
+            st.write("No data for net savings trend.")
+            return
+        monthly_summary = build_monthly_summary(df_for_trend)
 
-    df_month = df_for_trend.copy()
-    df_month['Date'] = pd.to_datetime(df_month['Date'], errors='coerce')
-    df_month = df_month.dropna(subset=['Date'])
-    if df_month.empty:
-        st.write("No valid date data for net savings trend.")
-        return
-
-    df_month.set_index('Date', inplace=True)
-    df_month['Amount'] = pd.to_numeric(df_month['Amount'], errors='coerce').fillna(0)
-    
-    net_month = df_month.resample('ME')['Amount'].sum().reset_index()
-    net_month.rename(columns={'Amount': 'Net Savings'}, inplace=True)
-    net_month['Net Savings'] = net_month['Net Savings'].fillna(0)
-
-    if not net_month.empty:
+    if not monthly_summary.empty:
         st.subheader(f"Net Savings Over Time (Monthly, {currency_suffix})")
-        net_idx = net_month.set_index('Date')['Net Savings']
-        st.bar_chart(net_idx)
+        st.bar_chart(monthly_summary['Net'].rename('Net Savings'))
     else:
         st.write("Not enough data for net savings trend.")
 
@@ -96,8 +98,8 @@ def plot_balance_trend(df_with_balance, currency_suffix):
         return
 
     df_bal_trend = df_with_balance.copy()
-    df_bal_trend['Date'] = pd.to_datetime(df_bal_trend['Date'], errors='coerce')
-    df_bal_trend['Balance'] = pd.to_numeric(df_bal_trend['Balance'], errors='coerce')
+    df_bal_trend['Date'] = ensure_datetime(df_bal_trend['Date'])
+    df_bal_trend['Balance'] = ensure_numeric(df_bal_trend['Balance'])
     df_bal_trend = df_bal_trend.dropna(subset=['Date', 'Balance'])
 
     if df_bal_trend.empty:
@@ -124,28 +126,18 @@ def plot_balance_trend(df_with_balance, currency_suffix):
         st.write("No data for end-of-year balance.")
 
 # --- Add more plotting functions here as needed ---
-def plot_monthly_spending_by_category(df_expenses, currency_suffix):
+def plot_monthly_spending_by_category(df_expenses, currency_suffix, monthly_category_spend=None):
     """Shows spending for each category, month by month."""
-    if df_expenses.empty:
-        st.write("No expense data for monthly category plot.")
-        return
+    if monthly_category_spend is None:
+        if df_expenses.empty:
+            st.write("No expense data for monthly category plot.")
+            return
+        monthly_category_spend = build_monthly_category_spend(df_expenses)
 
     st.subheader(f"Monthly Spending by Category ({currency_suffix})")
     
-    df_exp_monthly_cat = df_expenses.copy()
-    df_exp_monthly_cat['Date'] = pd.to_datetime(df_exp_monthly_cat['Date'], errors='coerce')
-    df_exp_monthly_cat = df_exp_monthly_cat.dropna(subset=['Date'])
-    if df_exp_monthly_cat.empty:
-        st.write("No valid date data for monthly category plot.")
-        return
-
-    df_exp_monthly_cat['Month'] = df_exp_monthly_cat['Date'].dt.to_period('M')
-    df_exp_monthly_cat['Absolute_Amount'] = pd.to_numeric(df_exp_monthly_cat['Amount'], errors='coerce').abs().fillna(0)
-
-    monthly_category_spend = df_exp_monthly_cat.groupby(['Month', 'Category'])['Absolute_Amount'].sum().unstack(fill_value=0)
-    
     if not monthly_category_spend.empty:
-        st.dataframe(monthly_category_spend.style.format("{:.2f}")) # Display as a table first
+        st.dataframe(monthly_category_spend.style.format("{:.2f}").format_index("{:%Y-%m}")) # Display as a table first
         
         # For plotting, st.bar_chart might get too crowded if many categories.
         # Consider allowing user to select a few categories to compare over time.
@@ -156,35 +148,20 @@ def plot_monthly_spending_by_category(df_expenses, currency_suffix):
             key="monthly_cat_trend_select"
         )
         if selected_cats_for_trend:
-            # Convert PeriodIndex to DatetimeIndex for st.line_chart if needed, or plot directly
-            data_to_plot = monthly_category_spend[selected_cats_for_trend].copy()
-            # st.line_chart might need datetime index
-            if isinstance(data_to_plot.index, pd.PeriodIndex):
-                 data_to_plot.index = data_to_plot.index.to_timestamp()
-            st.line_chart(data_to_plot)
+            st.line_chart(monthly_category_spend[selected_cats_for_trend]) # Month-start DatetimeIndex plots directly
     else:
         st.write("No data for monthly spending by category.")
 
-def plot_percentage_change_expenses(df_expenses, currency_suffix):
+def plot_percentage_change_expenses(df_expenses, currency_suffix, monthly_category_spend=None):
     """Shows MoM % change for top N expense categories."""
-    if df_expenses.empty:
-        st.write("No expense data for % change plot.")
-        return
+    if monthly_category_spend is None:
+        if df_expenses.empty:
+            st.write("No expense data for % change plot.")
+            return
+        monthly_category_spend = build_monthly_category_spend(df_expenses)
 
     st.subheader(f"Month-over-Month % Change in Top Expense Categories ({currency_suffix})")
 
-    df_exp_pct = df_expenses.copy()
-    df_exp_pct['Date'] = pd.to_datetime(df_exp_pct['Date'], errors='coerce')
-    df_exp_pct = df_exp_pct.dropna(subset=['Date'])
-    if df_exp_pct.empty:
-        st.write("No valid date data for % change plot.")
-        return
-        
-    df_exp_pct['Month'] = df_exp_pct['Date'].dt.to_period('M')
-    df_exp_pct['Absolute_Amount'] = pd.to_numeric(df_exp_pct['Amount'], errors='coerce').abs().fillna(0)
-
-    monthly_category_spend = df_exp_pct.groupby(['Month', 'Category'])['Absolute_Amount'].sum().unstack(fill_value=0)
-
     if monthly_category_spend.empty or len(monthly_category_spend) < 2:
         st.write("Not enough monthly data (at least 2 months) to calculate percentage change.")
         return
@@ -201,44 +178,28 @@ def plot_percentage_change_expenses(df_expenses, currency_suffix):
 
     if top_categories:
         st.write(f"Displaying MoM % change for: {', '.join(top_categories)}")
-        data_to_plot_pct = pct_change_df[top_categories].copy()
-        if isinstance(data_to_plot_pct.index, pd.PeriodIndex):
-            data_to_plot_pct.index = data_to_plot_pct.index.to_timestamp()
-        st.line_chart(data_to_plot_pct)
+        st.line_chart(pct_change_df[top_categories])
         
         # Display the table as well
-        st.dataframe(pct_change_df[top_categories].style.format("{:.2f}%"))
+        st.dataframe(pct_change_df[top_categories].style.format("{:.2f}%").format_index("{:%Y-%m}"))
     else:
         st.write("No categories found to display percentage change.")
 
-def plot_savings_rate_trend(df_for_trend, currency_suffix):
+def plot_savings_rate_trend(df_for_trend, currency_suffix, monthly_summary=None):
     """Calculates and plots the monthly savings rate."""
-    if df_for_trend.empty:
-        st.write("No data for savings rate trend.")
-        return
+    if monthly_summary is None:
+        if df_for_trend.empty:
+            st.write("No data for savings rate trend.")
+            return
+        monthly_summary = build_monthly_summary(df_for_trend)
 
     st.subheader(f"Monthly Savings Rate Trend ({currency_suffix})")
 
-    df_month = df_for_trend.copy()
-    df_month['Date'] = pd.to_datetime(df_month['Date'], errors='coerce')
-    df_month = df_month.dropna(subset=['Date'])
-    if df_month.empty:
-        st.write("No valid date data for savings rate trend.")
-        return
-        
-    df_month.set_index('Date', inplace=True)
-    df_month['Amount'] = pd.to_numeric(df_month['Amount'], errors='coerce').fillna(0)
-
     monthly_summary = (
-        df_month.resample('ME')['Amount']
-        .agg(
-            Income=lambda x: x[x > 0].sum(),
-            Expenses=lambda x: x[x < 0].sum() # Expenses are negative
-        )
+        monthly_summary[['Income', 'Expenses']]
+        .rename(columns={'Expenses': 'Expenses_Abs'}) # Absolute expenses
         .reset_index()
     )
-    monthly_summary['Income'] = monthly_summary['Income'].fillna(0)
-    monthly_summary['Expenses_Abs'] = monthly_summary['Expenses'].fillna(0).abs() # Absolute expenses
     
     # Calculate Net Savings
     monthly_summary['Net_Savings'] = monthly_summary['Income'] - monthly_summary['Expenses_Abs']
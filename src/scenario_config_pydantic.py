@@ -4,12 +4,17 @@ from pydantic import BaseModel, Field, validator
 import pandas as pd # For storing/retrieving DataFrame results
 
 # --- Component Parameter Structures (using Pydantic BaseModel) ---
-class CashHoldingParams(BaseModel):
+class ComponentParams(BaseModel):
+    """ Base for the component models: the planner form assigns their fields one by one. """
+    class Config:
+        validate_assignment = True # Keep the Field bounds enforced on every assignment
+
+class CashHoldingParams(ComponentParams):
     name: str = "Cash Savings"
     initial_amount: float = 0.0
     annual_interest_rate: float = 0.001
 
-class StockInvestmentParams(BaseModel):
+class StockInvestmentParams(ComponentParams):
     name: str = "Stock Portfolio"
     initial_investment: float = 0.0
     annual_contribution: float = 0.0
@@ -18,7 +23,7 @@ class StockInvestmentParams(BaseModel):
     # volatility_std_dev: Optional[float] = 0.15
     # dividend_yield: Optional[float] = 0.015
 
-class RealEstateParams(BaseModel):
+class RealEstateParams(ComponentParams):
     name: str = "Property Investment"
     is_primary_residence: bool = False
     purchase_price: float = 0.0
@@ -41,12 +46,12 @@ class RealEstateParams(BaseModel):
     equivalent_monthly_rent_saved: float = 0.0
     selling_costs_pct: float = Field(default=0.06, ge=0.0, le=1.0)
 
-class IncomeSourceParams(BaseModel):
+class IncomeSourceParams(ComponentParams):
     name: str = "Primary Salary"
     initial_annual_income: float = 60000.0
     expected_annual_growth_rate: float = 0.025
 
-class MajorExpenseParams(BaseModel):
+class MajorExpenseParams(ComponentParams):
     name: str = "Future Expense"
     year_of_expense: int = Field(default=5, gt=0)
     amount: float = 10000.0 # In today's currency, will be inflated by runner
@@ -72,27 +77,27 @@ class ScenarioConfig(BaseModel):
     major_expenses: List[MajorExpenseParams] = Field(default_factory=list)
     
     # Results storage (Pydantic can't directly serialize DataFrames to JSON by default)
-    # We'll store the DataFrame data as a list of dictionaries
-    results_timeseries_data: Optional[List[Dict[str, Any]]] = None 
+    # We'll store the DataFrame data column-wise as a dict of lists ({column: values})
+    results_timeseries_data: Optional[Dict[str, List[Any]]] = None 
     summary_metrics: Optional[Dict[str, Any]] = None
 
     # Custom methods to handle DataFrame results for serialization/deserialization
     def set_results_timeseries(self, df: pd.DataFrame):
-        """Converts DataFrame to list of dicts for storage."""
+        """Converts DataFrame to a dict of column lists for storage."""
         if df is not None and not df.empty:
             df_copy = df.copy()
             for col in df_copy.select_dtypes(include=['datetime64[ns]', 'datetime64[ns, UTC]']).columns:
                 # Ensure Timestamps are converted to ISO strings for JSON
                 # Pydantic v2 handles datetime serialization well, but explicit can be safer for generic JSON
                 df_copy[col] = df_copy[col].dt.strftime('%Y-%m-%dT%H:%M:%S') # Example ISO format
-            self.results_timeseries_data = df_copy.to_dict(orient='records')
+            self.results_timeseries_data = df_copy.to_dict(orient='list')
         else:
             self.results_timeseries_data = None
 
     def get_results_timeseries_df(self) -> Optional[pd.DataFrame]:
-        """Converts stored list of dicts back to DataFrame."""
+        """Converts stored column lists back to DataFrame."""
         if self.results_timeseries_data:
-            df = pd.DataFrame.from_records(self.results_timeseries_data)
+            df = pd.DataFrame(self.results_timeseries_data)
             # Attempt to convert known date columns back to datetime
             # Example: if 'Year' column was originally an int, no need to convert.
             # If you stored actual date columns as ISO strings, convert them back:
@@ -5,10 +5,11 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.append(str(PROJECT_ROOT))"""
 
 import pandas as pd
+import numpy as np
+from functools import lru_cache
 from src.financial_models import (
-    calculate_compound_growth, project_investment_value_over_time,
-    calculate_loan_payment, generate_amortization_schedule,
-    project_asset_value, project_asset_value_over_time,
+    project_balance_path, project_value_path,
+    calculate_loan_payment, loan_year_end_balances,
     apply_inflation, adjust_for_inflation_to_present_value
     # Import others as needed
 )
@@ -19,47 +20,99 @@ from src.scenario_config import (ScenarioConfig
                                  ,IncomeSourceParams
                                  ,MajorExpenseParams) # Import the dataclass structure
 
-def run_scenario(config: ScenarioConfig) -> ScenarioConfig:
+def _stack_by_year(projections: dict, horizon: int) -> np.ndarray:
+    """ Stacks {name: array of yearly values} into a (n_components, horizon) array. """
+    if not projections:
+        return np.zeros((0, horizon))
+    return np.vstack(list(projections.values()))
+
+def _aggregate_yearly(cash, stocks, real_estate_equity, real_estate_debt, income,
+                      real_estate_cashflow, major_expenses, base_living_expenses,
+                      inflation_rate, years) -> dict:
+    """
+    Pure-numeric yearly aggregation: component arrays are (n_components, horizon),
+    major_expenses is (horizon,). Returns the result columns as arrays of length horizon.
+    """
+    # --- Assets ---
+    total_cash = cash.sum(axis=0)
+    total_stocks = stocks.sum(axis=0)
+    total_real_estate_equity = real_estate_equity.sum(axis=0)
+    total_assets = total_cash + total_stocks + total_real_estate_equity
+
+    # --- Liabilities ---
+    # Add other debts if modeled (e.g., student loans, car loans)
+    total_liabilities = real_estate_debt.sum(axis=0)
+    net_worth = total_assets - total_liabilities
+
+    # --- Cash Flow Elements (Simplified) ---
+    total_income = income.sum(axis=0)
+    total_real_estate_cf = real_estate_cashflow.sum(axis=0)
+    living_expenses = apply_inflation(base_living_expenses, inflation_rate, years)
+
+    # Net Cash Flow: Income + RE_Cashflow - LivingExpenses - MajorExpenses_this_year
+    # Note: Investment contributions are handled within their projections.
+    # Mortgage payments are implicitly handled in RE_Cashflow or RE_Debt reduction.
+    net_cash_flow = total_income + total_real_estate_cf - living_expenses - major_expenses
+
+    # Real values: discount nominal values back to present day (Year 0)
+    def to_real(values):
+        return adjust_for_inflation_to_present_value(values, inflation_rate, years)
+
+    return {
+        'Net_Worth_Nominal': net_worth,
+        'Net_Worth_Real': to_real(net_worth),
+        'Total_Assets_Nominal': total_assets,
+        'Total_Assets_Real': to_real(total_assets),
+        'Assets_Cash_Nominal': total_cash,
+        'Assets_Stocks_Nominal': total_stocks,
+        'Assets_RealEstate_Equity_Nominal': total_real_estate_equity,
+        'Total_Liabilities_Nominal': total_liabilities, # Liabilities are usually nominal
+        'Income_Sources_Total_Nominal': total_income,
+        'Income_Sources_Total_Real': to_real(total_income),
+        'RealEstate_Net_Cashflow_Nominal': total_real_estate_cf,
+        'Annual_Living_Expenses_Nominal': living_expenses,
+        'Annual_Living_Expenses_Real': to_real(living_expenses),
+        'Major_Expenses_Scheduled_Nominal': major_expenses, # Already inflated
+        'Net_Annual_Cash_Flow_Est_Nominal': net_cash_flow
+    }
+
+def project_scenario(config) -> tuple:
     """
-    Runs the financial projection for a given scenario configuration.
-    Populates config.results_timeseries and config.summary_metrics.
+    Runs the financial projection for a given scenario configuration without modifying it.
+    Returns ({column: ndarray} yearly results, summary_metrics dict).
+    Works with any config exposing the ScenarioConfig fields (dataclass or pydantic).
     """
     horizon = config.horizon_years
     inflation_rate = config.general_annual_inflation_rate
     
-    # Initialize yearly data storage
-    yearly_results = []
-    
     # --- Initialize Starting State for Assets and Liabilities ---
     # This needs careful thought: how do initial components contribute to starting net worth?
     # For simplicity, let's assume we track component values separately and sum them up.
     
     # Create detailed projections for each component over the horizon
-    # These will be DataFrames showing year-by-year values for each asset/liability
+    # Each is an array of year-end values for years 1..horizon (closed-form, no per-year loops)
     
     # Cash Projections
-    all_cash_projections = {} # Dict to store df for each cash holding
+    all_cash_projections = {} # Dict to store the yearly values for each cash holding
     for cash_item in config.cash_holdings:
         # Simple model: cash grows by its own interest, or is just a static pool
         # For dynamic cash flow, this needs to be integrated into the main loop
         # For now, let's assume it's an account that just sits there or has its own growth
-        cash_df = project_investment_value_over_time(
+        all_cash_projections[cash_item.name] = project_balance_path(
             principal=cash_item.initial_amount,
             annual_rate=cash_item.annual_interest_rate,
             years_horizon=horizon
         )
-        all_cash_projections[cash_item.name] = cash_df.set_index('Year')['End_Balance']
 
     # Stock Investment Projections
     all_stock_projections = {}
     for stock_item in config.stock_investments:
-        stock_df = project_investment_value_over_time(
+        all_stock_projections[stock_item.name] = project_balance_path(
             principal=stock_item.initial_investment,
             annual_rate=stock_item.expected_annual_return,
             years_horizon=horizon,
             annual_contribution=stock_item.annual_contribution # Assuming contributions from other sources
         )
-        all_stock_projections[stock_item.name] = stock_df.set_index('Year')['End_Balance']
 
     # Real Estate Projections (more complex)
     all_real_estate_equity = {}
@@ -71,43 +124,22 @@ def run_scenario(config: ScenarioConfig) -> ScenarioConfig:
         loan_amount = prop_item.purchase_price * (1 - prop_item.down_payment_pct)
         
         # Property Value Appreciation
-        prop_value_df = project_asset_value_over_time(
+        all_real_estate_value[prop_item.name] = project_value_path(
             initial_value=prop_item.purchase_price,
             annual_growth_rate=prop_item.expected_annual_appreciation,
             years_horizon=horizon
         )
-        all_real_estate_value[prop_item.name] = prop_value_df.set_index('Year')['Value']
 
-        # Mortgage Debt
+        # Mortgage Debt: year-end remaining balances (0 once paid off before the horizon)
         if loan_amount > 0:
-            amort_schedule = generate_amortization_schedule(
+            all_real_estate_debt[prop_item.name] = loan_year_end_balances(
                 principal=loan_amount,
                 annual_interest_rate=prop_item.mortgage_interest_rate_annual,
-                loan_term_years=prop_item.mortgage_term_years
+                loan_term_years=prop_item.mortgage_term_years,
+                years_horizon=horizon
             )
-            # Get end-of-year remaining balance
-            # Need to map payment periods to years
-            # For simplicity, let's take remaining balance at year end.
-            # This requires a more detailed merge or lookup.
-            # Quick approx: assume constant principal reduction over mortgage term for simplicity here,
-            # OR use the amort_schedule to find year-end balances
-            
-            # Correctly get year-end balances from amortization schedule
-            debt_series_list = []
-            for year_idx in range(1, horizon + 1):
-                payments_this_year = min(year_idx * 12, len(amort_schedule)) # Cap at total payments
-                if payments_this_year > 0:
-                    debt_series_list.append(amort_schedule.loc[payments_this_year - 1, 'Remaining_Balance'])
-                else: # Before any payments
-                    debt_series_list.append(loan_amount)
-            
-            # Handle cases where loan is paid off before horizon
-            while len(debt_series_list) < horizon:
-                debt_series_list.append(0) # Paid off
-
-            all_real_estate_debt[prop_item.name] = pd.Series(debt_series_list, index=range(1, horizon + 1))
         else:
-            all_real_estate_debt[prop_item.name] = pd.Series([0]*horizon, index=range(1, horizon + 1))
+            all_real_estate_debt[prop_item.name] = np.zeros(horizon)
 
         # Equity = Value - Debt
         all_real_estate_equity[prop_item.name] = all_real_estate_value[prop_item.name] - all_real_estate_debt[prop_item.name]
@@ -124,129 +156,73 @@ def run_scenario(config: ScenarioConfig) -> ScenarioConfig:
             # Only consider first year's mortgage payment for simplicity here
             # A more accurate model would take the annual mortgage payment from the amortization schedule
             mortgage_payment_annual = 0
-            if loan_amount > 0 and not amort_schedule.empty:
-                 # Sum of first 12 payments or fewer if loan term is < 1 year
-                mortgage_payment_annual = amort_schedule.head(12)['Payment'].sum()
+            if loan_amount > 0:
+                # First 12 payments, or fewer if the loan term is < 1 year
+                first_year_payments = min(12, int(prop_item.mortgage_term_years * 12))
+                mortgage_payment_annual = calculate_loan_payment(
+                    loan_amount, prop_item.mortgage_interest_rate_annual, prop_item.mortgage_term_years
+                ) * first_year_payments
 
 
             op_expenses_annual = management_annual + taxes_annual + prop_item.insurance_annual_fixed + maintenance_annual
             annual_cashflow = gross_rent_annual - op_expenses_annual - mortgage_payment_annual
-            all_real_estate_cashflow_annual[prop_item.name] = pd.Series([annual_cashflow]*horizon, index=range(1, horizon + 1))
+            all_real_estate_cashflow_annual[prop_item.name] = np.full(horizon, annual_cashflow, dtype=np.float64)
 
         elif prop_item.is_primary_residence:
             # "Saved" rent could be considered positive cash flow or reduced expenses elsewhere
             annual_cashflow = prop_item.equivalent_monthly_rent_saved * 12
-            all_real_estate_cashflow_annual[prop_item.name] = pd.Series([annual_cashflow]*horizon, index=range(1, horizon + 1))
+            all_real_estate_cashflow_annual[prop_item.name] = np.full(horizon, annual_cashflow, dtype=np.float64)
         else:
-            all_real_estate_cashflow_annual[prop_item.name] = pd.Series([0]*horizon, index=range(1, horizon + 1))
+            all_real_estate_cashflow_annual[prop_item.name] = np.zeros(horizon)
 
 
     # Income Projections
     all_income_projections = {}
     for income_item in config.income_sources:
-        income_df = project_asset_value_over_time( # Using this for simplicity to project growth
+        all_income_projections[income_item.name] = project_value_path( # Using this for simplicity to project growth
             initial_value=income_item.initial_annual_income,
             annual_growth_rate=income_item.expected_annual_growth_rate,
             years_horizon=horizon
         )
-        all_income_projections[income_item.name] = income_df.set_index('Year')['Value']
-
-    # --- Main Simulation Loop (Year by Year) ---
-    # This loop will aggregate values from the pre-calculated component projections.
-    # A more sophisticated model would have dynamic cash flow affecting contributions to investments etc.
-    # This version is simpler: components evolve somewhat independently, then we sum up.
-    
-    for year in range(1, horizon + 1):
-        # --- Assets ---
-        total_cash_year = sum(proj.get(year, 0) for proj_name, proj in all_cash_projections.items())
-        total_stocks_year = sum(proj.get(year, 0) for proj_name, proj in all_stock_projections.items())
-        total_real_estate_equity_year = sum(proj.get(year, 0) for proj_name, proj in all_real_estate_equity.items())
-        
-        total_assets_year = total_cash_year + total_stocks_year + total_real_estate_equity_year
-
-        # --- Liabilities ---
-        total_real_estate_debt_year = sum(proj.get(year, 0) for proj_name, proj in all_real_estate_debt.items())
-        # Add other debts if modeled (e.g., student loans, car loans)
-        total_liabilities_year = total_real_estate_debt_year
-        
-        net_worth_year = total_assets_year - total_liabilities_year
-        
-        # --- Cash Flow Elements for this year (Simplified) ---
-        total_income_from_sources_year = sum(proj.get(year, 0) for proj_name, proj in all_income_projections.items())
-        total_real_estate_cf_year = sum(proj.get(year, 0) for proj_name, proj in all_real_estate_cashflow_annual.items())
-        
-        # Major Expenses for this year
-        current_year_major_expenses = 0
-        for expense_item in config.major_expenses:
-            if expense_item.year_of_expense == year:
-                current_year_major_expenses += apply_inflation(expense_item.amount, inflation_rate, year) # Inflate future expense
-            # Add logic for recurring major expenses if needed
 
-        # Living expenses (This is a big assumption or needs detailed input)
-        # For now, let's assume a fixed (inflated) living expense not covered by specific models
-        # This should ideally come from Phase 1 analysis or be an input.
-        """annual_living_expenses_base = config.base_annual_living_expenses # Example base
-        annual_living_expenses_inflated = apply_inflation(annual_living_expenses_base, inflation_rate, year)"""
+    # --- Yearly Aggregation ---
+    # Components evolve independently, then get summed per year. Each group of projections is
+    # stacked into a (components x years) array so the aggregation runs as NumPy ops instead of
+    # a Python loop over years.
+    years = np.arange(1, horizon + 1)
 
-        annual_living_expenses_base = config.base_annual_living_expenses if config.base_annual_living_expenses is not None else 30000.0 # Fallback
-        annual_living_expenses_inflated = apply_inflation(annual_living_expenses_base, inflation_rate, year)
-        
-        # Net Cash Flow for the year (approximation)
-        # Income + RE_Cashflow - LivingExpenses - MajorExpenses_this_year
-        # Note: Investment contributions are handled within their projections.
-        # Mortgage payments are implicitly handled in RE_Cashflow or RE_Debt reduction.
-        net_cash_flow_year = total_income_from_sources_year + total_real_estate_cf_year \
-                             - annual_living_expenses_inflated - current_year_major_expenses
-        
+    # Major Expenses: inflated to the year they occur in
+    major_expenses = np.zeros(horizon)
+    for expense_item in config.major_expenses:
+        if 1 <= expense_item.year_of_expense <= horizon:
+            major_expenses[expense_item.year_of_expense - 1] += apply_inflation(
+                expense_item.amount, inflation_rate, expense_item.year_of_expense
+            ) # Inflate future expense
+        # Add logic for recurring major expenses if needed
 
-        # Calculate real values by discounting nominal values back to present day (Year 0)
-        real_net_worth_year = adjust_for_inflation_to_present_value(
-            net_worth_year, # This is the nominal net worth for the current 'year'
-            config.general_annual_inflation_rate,
-            year # Number of years from the start of the scenario
-        )
-        real_total_assets_year = adjust_for_inflation_to_present_value(
-            total_assets_year, config.general_annual_inflation_rate, year
-        )
-        # ... (similarly for other key financial figures you want in real terms)
-        real_income_year = adjust_for_inflation_to_present_value(
-            total_income_from_sources_year, config.general_annual_inflation_rate, year
-        )
-        real_living_expenses_year = adjust_for_inflation_to_present_value(
-            annual_living_expenses_inflated, config.general_annual_inflation_rate, year
-        )
+    # Living expenses (fixed base, inflated each year)
+    annual_living_expenses_base = config.base_annual_living_expenses if config.base_annual_living_expenses is not None else 30000.0 # Fallback
 
-        yearly_results.append({
-            'Year': year,
-            'Net_Worth_Nominal': net_worth_year,
-            'Net_Worth_Real': real_net_worth_year,
-            'Total_Assets_Nominal': total_assets_year,
-            'Total_Assets_Real': real_total_assets_year,
-            'Assets_Cash_Nominal': total_cash_year, # Assuming this is already nominal for the year
-            'Assets_Stocks_Nominal': total_stocks_year,
-            'Assets_RealEstate_Equity_Nominal': total_real_estate_equity_year,
-            'Total_Liabilities_Nominal': total_liabilities_year, # Liabilities are usually nominal
-            'Income_Sources_Total_Nominal': total_income_from_sources_year,
-            'Income_Sources_Total_Real': real_income_year,
-            'RealEstate_Net_Cashflow_Nominal': total_real_estate_cf_year,
-            'Annual_Living_Expenses_Nominal': annual_living_expenses_inflated,
-            'Annual_Living_Expenses_Real': real_living_expenses_year,
-            'Major_Expenses_Scheduled_Nominal': current_year_major_expenses, # This was already inflated
-            'Net_Annual_Cash_Flow_Est_Nominal': net_cash_flow_year
-            # Add real cash flow if needed
-        })
-        
-    #config.results_timeseries = pd.DataFrame(yearly_results)
+    totals = _aggregate_yearly(
+        cash=_stack_by_year(all_cash_projections, horizon),
+        stocks=_stack_by_year(all_stock_projections, horizon),
+        real_estate_equity=_stack_by_year(all_real_estate_equity, horizon),
+        real_estate_debt=_stack_by_year(all_real_estate_debt, horizon),
+        income=_stack_by_year(all_income_projections, horizon),
+        real_estate_cashflow=_stack_by_year(all_real_estate_cashflow_annual, horizon),
+        major_expenses=major_expenses,
+        base_living_expenses=annual_living_expenses_base,
+        inflation_rate=inflation_rate,
+        years=years
+    )
 
-    # Use your setter method:
-    results_df = pd.DataFrame(yearly_results)
-    config.set_results_timeseries(results_df) # This will store it correctly as results_timeseries_data
+    results_columns = {'Year': years, **totals}
     
     # --- Summary Metrics ---
-    if not results_df.empty: # Check the DataFrame before accessing .iloc
-        final_net_worth_nominal = results_df['Net_Worth_Nominal'].iloc[-1]
-        final_net_worth_real = results_df['Net_Worth_Real'].iloc[-1]
-        config.summary_metrics = {
+    if horizon > 0:
+        final_net_worth_nominal = totals['Net_Worth_Nominal'][-1]
+        final_net_worth_real = totals['Net_Worth_Real'][-1]
+        summary_metrics = {
             'Scenario_Name': config.name,
             'Ending_Net_Worth_Nominal': final_net_worth_nominal,
             'Ending_Net_Worth_Real': final_net_worth_real,
@@ -254,13 +230,31 @@ def run_scenario(config: ScenarioConfig) -> ScenarioConfig:
             # Add more...
         }
     else:
-        config.summary_metrics = { # Default summary if no results
+        summary_metrics = { # Default summary if no results
             'Scenario_Name': config.name,
             'Ending_Net_Worth_Nominal': 0,
             'Ending_Net_Worth_Real': 0,
             'Horizon_Years': config.horizon_years
         }
         
+    return results_columns, summary_metrics
+
+@lru_cache(maxsize=32)
+def project_scenario_cached(config: ScenarioConfig) -> tuple:
+    """
+    project_scenario memoized on the frozen (hashable) ScenarioConfig itself, no JSON key needed.
+    The returned arrays/dicts are shared between calls: treat them as read-only.
+    """
+    return project_scenario(config)
+
+def run_scenario(config):
+    """
+    Runs the projection and stores the results on a mutable config (the pydantic ScenarioConfig):
+    config.set_results_timeseries(...) and config.summary_metrics. Returns the config.
+    """
+    results_columns, summary_metrics = project_scenario(config)
+    config.set_results_timeseries(pd.DataFrame(results_columns))
+    config.summary_metrics = summary_metrics
     return config
     
     """# --- Summary Metrics ---
@@ -285,28 +279,27 @@ if __name__ == '__main__':
         name="Test Investment Scenario",
         horizon_years=10,
         general_annual_inflation_rate=0.02,
-        initial_cash_on_hand=20000 # Part of a cash holding
-    )
-    
-    test_config.cash_holdings.append(
-        CashHoldingParams(initial_amount=20000, annual_interest_rate=0.005)
-    )
-    test_config.stock_investments.append(
-        StockInvestmentParams(
-            initial_investment=50000, 
-            annual_contribution=5000, 
-            expected_annual_return=0.06
-        )
-    )
-    test_config.income_sources.append(
-        IncomeSourceParams(initial_annual_income=70000, expected_annual_growth_rate=0.03)
+        initial_cash_on_hand=20000, # Part of a cash holding
+        cash_holdings=(
+            CashHoldingParams(initial_amount=20000, annual_interest_rate=0.005),
+        ),
+        stock_investments=(
+            StockInvestmentParams(
+                initial_investment=50000, 
+                annual_contribution=5000, 
+                expected_annual_return=0.06
+            ),
+        ),
+        income_sources=(
+            IncomeSourceParams(initial_annual_income=70000, expected_annual_growth_rate=0.03),
+        ),
+        # major_expenses=(
+        #     MajorExpenseParams(name="Car Purchase", year_of_expense=5, amount=25000),
+        # ),
     )
-    # test_config.major_expenses.append(
-    #     MajorExpenseParams(name="Car Purchase", year_of_expense=5, amount=25000)
-    # )
 
     # Real Estate Example (Optional for initial test)
-    # test_config.real_estate_investments.append(
+    # test_config = dataclasses.replace(test_config, real_estate_investments=(
     #     RealEstateParams(
     #         name="Rental Property A",
     #         purchase_price=300000,
@@ -321,16 +314,14 @@ if __name__ == '__main__':
     #         property_tax_annual_pct_value=0.006,
     #         insurance_annual_fixed=600,
     #         maintenance_annual_pct_value=0.01
-    #     )
-    # )
+    #     ),
+    # ))
 
     
-    result_config = run_scenario(test_config)
+    results_columns, summary_metrics = project_scenario(test_config)
     
-    if result_config.results_timeseries is not None:
-        print(f"\n--- Results for Scenario: {result_config.name} ---")
-        print(result_config.results_timeseries)
-    if result_config.summary_metrics is not None:
-        print("\n--- Summary Metrics ---")
-        for k, v in result_config.summary_metrics.items():
-            print(f"{k}: {v}")
\ No newline at end of file
+    print(f"\n--- Results for Scenario: {test_config.name} ---")
+    print(pd.DataFrame(results_columns))
+    print("\n--- Summary Metrics ---")
+    for k, v in summary_metrics.items():
+        print(f"{k}: {v}")
@@ -0,0 +1,63 @@
+# src/scenario_serde.py
+# Dict/JSON <-> dataclass conversion for ScenarioConfig and its nested component params.
+# The field walk for each class is computed once and cached, so repeated saves/loads
+# don't redo dataclasses.fields() reflection.
+import dataclasses
+from functools import lru_cache
+import orjson
+
+from src.scenario_config import (
+    ScenarioConfig,
+    CashHoldingParams,
+    StockInvestmentParams,
+    RealEstateParams,
+    IncomeSourceParams,
+    MajorExpenseParams
+)
+
+# Tuple fields of ScenarioConfig holding nested dataclasses → the class used to rebuild each item
+NESTED_LIST_TYPES = {
+    'cash_holdings': CashHoldingParams,
+    'stock_investments': StockInvestmentParams,
+    'real_estate_investments': RealEstateParams,
+    'income_sources': IncomeSourceParams,
+    'major_expenses': MajorExpenseParams,
+}
+
+@lru_cache(maxsize=None)
+def _field_plan(cls):
+    """ (field_name, nested item class or None) for every field of `cls`. """
+    nested = NESTED_LIST_TYPES if cls is ScenarioConfig else {}
+    return tuple((f.name, nested.get(f.name)) for f in dataclasses.fields(cls))
+
+def _unstructure(obj):
+    out = {}
+    for name, item_cls in _field_plan(type(obj)):
+        value = getattr(obj, name)
+        out[name] = [_unstructure(item) for item in value] if item_cls else value
+    return out
+
+def _structure(data, cls):
+    kwargs = {}
+    for name, item_cls in _field_plan(cls):
+        if name in data: # Missing keys fall back to the dataclass defaults; unknown keys are ignored
+            value = data[name]
+            kwargs[name] = tuple(_structure(item, item_cls) for item in value) if item_cls else value
+    return cls(**kwargs)
+
+def unstructure_scenario(config: ScenarioConfig) -> dict:
+    """ ScenarioConfig → plain dict (nested components as dicts). """
+    return _unstructure(config)
+
+def structure_scenario(data: dict) -> ScenarioConfig:
+    """ Plain dict (e.g. from JSON) → frozen ScenarioConfig with tuples of nested component dataclasses. """
+    return _structure(data, ScenarioConfig)
+
+def dumps_scenario(config: ScenarioConfig, indent: bool = False) -> bytes:
+    """ ScenarioConfig → JSON bytes. Keys keep field order, so equal configs give equal bytes. """
+    option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+    return orjson.dumps(unstructure_scenario(config), option=option)
+
+def loads_scenario(payload) -> ScenarioConfig:
+    """ JSON bytes/str → ScenarioConfig. """
+    return structure_scenario(orjson.loads(payload))
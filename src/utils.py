@@ -1,10 +1,43 @@
 # src/utils.py (or a new src/currency_converter.py)
 import pandas as pd
+import numpy as np
 
 # Placeholder: In a real app, fetch this dynamically or use a library
 # For simplicity, using a fixed rate. Update this or fetch from an API.
 DKK_TO_EUR_RATE = 1 / 7.46 # Example: 1 EUR = 7.46 DKK
 
+def ensure_datetime(series):
+    """
+    Returns `series` untouched if it is already datetime64 (the loaders parse 'Date' once),
+    otherwise parses it with errors='coerce'. Avoids re-scanning already-parsed columns.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series, errors='coerce')
+
+def ensure_numeric(series):
+    """
+    Returns `series` untouched if it is already numeric (the loader stores Amount as float32),
+    otherwise converts it with errors='coerce'. Avoids an extra pass over already-typed columns.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series, errors='coerce')
+
+def ensure_expense_schema(df):
+    """
+    The typed transaction frame the analysis code assumes: Date datetime64, Amount float32 and
+    Category categorical (when present), without rows lacking a Date or Amount.
+    Applied once where transactions are prepared; casts are no-ops for columns already typed.
+    """
+    df = df.assign(
+        Date=ensure_datetime(df['Date']),
+        Amount=ensure_numeric(df['Amount']).astype('float32', copy=False)
+    )
+    if 'Category' in df.columns and not isinstance(df['Category'].dtype, pd.CategoricalDtype):
+        df['Category'] = df['Category'].astype('category')
+    return df.dropna(subset=['Date', 'Amount'])
+
 def convert_currency_in_df(df, amount_col='Amount', balance_col='Balance', target_currency='EUR', rate_dkk_eur=DKK_TO_EUR_RATE):
     """
     Converts 'Amount' and 'Balance' columns from DKK to target_currency (EUR by default).
@@ -13,10 +46,12 @@ def convert_currency_in_df(df, amount_col='Amount', balance_col='Balance', targe
     df_converted = df.copy()
     if amount_col in df_converted.columns:
         # Ensure amount_col is numeric
-        df_converted[amount_col] = pd.to_numeric(df_converted[amount_col], errors='coerce')
-        df_converted[amount_col] = df_converted[amount_col] * rate_dkk_eur
+        df_converted[amount_col] = ensure_numeric(df_converted[amount_col])
+        # Multiply by a rate of the same dtype so a float32 Amount stays float32
+        rate = np.float32(rate_dkk_eur) if df_converted[amount_col].dtype == np.float32 else rate_dkk_eur
+        df_converted[amount_col] = df_converted[amount_col] * rate
     if balance_col in df_converted.columns and balance_col != amount_col: # Avoid double conversion if same col
-        df_converted[balance_col] = pd.to_numeric(df_converted[balance_col], errors='coerce')
+        df_converted[balance_col] = ensure_numeric(df_converted[balance_col])
         df_converted[balance_col] = df_converted[balance_col] * rate_dkk_eur
     
     # Update currency column if it exists